@@ -0,0 +1,50 @@
+# fortitudo.tech - Novel Investment Technologies.
+# Copyright (C) 2021-2025 Fortitudo Technologies.
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Benchmark of the import time of fortitudo.tech in fresh interpreters.
+
+Run from the repository root: python benchmarks/import_time.py
+"""
+
+import os
+import subprocess
+import sys
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+STATEMENTS = (
+    'import fortitudo.tech',
+    'from fortitudo.tech import entropy_pooling, portfolio_cvar',
+    'from fortitudo.tech import *')
+
+
+def import_time(statement, repeats):
+    code = (f'from time import perf_counter; start = perf_counter(); {statement}; '
+            'print(perf_counter() - start)')
+    times = [float(subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True,
+                                  text=True, check=True).stdout) for _ in range(repeats)]
+    return np.median(times)
+
+
+def main(repeats=7):
+    for statement in STATEMENTS:
+        seconds = import_time(statement, repeats)
+        print(f'{statement:60s} {1000 * seconds:7.1f}ms')
+
+
+if __name__ == '__main__':
+    main()
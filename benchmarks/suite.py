@@ -0,0 +1,245 @@
+# fortitudo.tech - Novel Investment Technologies.
+# Copyright (C) 2021-2025 Fortitudo Technologies.
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Benchmark suite for the core algorithms with machine-readable results.
+
+Each benchmark is run for a list of problem sizes given by the chosen preset. After an
+untimed warm-up run, the wall-clock time is the best of several repeats, and the peak
+memory is measured with tracemalloc in a separate run, so it covers Python and numpy
+allocations but not memory allocated internally by cvxopt. The results are written as
+JSON together with the package versions, and a previous results file can be given to
+report changes. Benchmarks that are only in one of the two results are reported as added
+or removed, and like regressions they give a nonzero exit status.
+
+Run from the repository root, e.g.:
+    python benchmarks/suite.py --preset small --output results.json
+    python benchmarks/suite.py --preset small --compare results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tracemalloc
+from importlib import metadata
+from time import perf_counter
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import fortitudo.tech as ft
+
+PRESETS = {
+    'small': {
+        'entropy_pooling': [{'S': 10_000, 'I': 10, 'views': 5}],
+        'entropy_pooling_pnl': [{'views': 10}],
+        'portfolio_cvar': [{'S': 10_000, 'I': 10, 'portfolios': 10}],
+        'mean_cvar': [{'S': 10_000, 'I': 10, 'portfolios': 1}],
+        'mean_cvar_pnl': [{'portfolios': 5}],
+        'ffr_simulate': [{'T': 2_500, 'I': 10, 'S': 10_000, 'H': 21}],
+        'exposure_stacking': [{'I': 10, 'B': 100, 'L': 5}]},
+    'medium': {
+        'entropy_pooling': [{'S': 100_000, 'I': 100, 'views': 10},
+                            {'S': 1_000_000, 'I': 10, 'views': 10}],
+        'entropy_pooling_pnl': [{'views': 10}],
+        'portfolio_cvar': [{'S': 1_000_000, 'I': 100, 'portfolios': 10},
+                           {'S': 100_000, 'I': 1_000, 'portfolios': 100}],
+        'mean_cvar': [{'S': 100_000, 'I': 100, 'portfolios': 1},
+                      {'S': 100_000, 'I': 10, 'portfolios': 9}],
+        'mean_cvar_pnl': [{'portfolios': 9}],
+        'ffr_simulate': [{'T': 5_000, 'I': 35, 'S': 100_000, 'H': 63}],
+        'exposure_stacking': [{'I': 100, 'B': 500, 'L': 10}]},
+    'large': {
+        'entropy_pooling': [{'S': 10_000_000, 'I': 10, 'views': 10},
+                            {'S': 1_000_000, 'I': 100, 'views': 50}],
+        'entropy_pooling_pnl': [{'views': 10}],
+        'portfolio_cvar': [{'S': 10_000_000, 'I': 10, 'portfolios': 10},
+                           {'S': 100_000, 'I': 5_000, 'portfolios': 10}],
+        'mean_cvar': [{'S': 1_000_000, 'I': 100, 'portfolios': 1},
+                      {'S': 10_000, 'I': 5_000, 'portfolios': 1}],
+        'mean_cvar_pnl': [{'portfolios': 20}],
+        'ffr_simulate': [{'T': 5_000, 'I': 35, 'S': 1_000_000, 'H': 252}],
+        'exposure_stacking': [{'I': 1_000, 'B': 1_000, 'L': 10}]},
+}
+
+
+def synthetic_pnl(S, I, seed=0):
+    """Student t P&L with a one-factor correlation structure and positive drift."""
+    rng = np.random.default_rng(seed)
+    factor = rng.standard_t(5, (S, 1))
+    loadings = np.linspace(0.2, 0.8, I)
+    idiosyncratic = rng.standard_t(5, (S, I))
+    return 0.02 * (loadings * factor + np.sqrt(1 - loadings**2) * idiosyncratic) + 0.001 * (
+        1 + np.arange(I) / I)
+
+
+def mean_views(R, views):
+    """Views that shift the means of the first instruments by a quarter standard deviation."""
+    S = R.shape[0]
+    A = np.vstack((np.ones((1, S)), R[:, :views].T))
+    b = np.vstack(([[1.]], (np.mean(R[:, :views], axis=0)
+                            + 0.25 * np.std(R[:, :views], axis=0))[:, np.newaxis]))
+    return A, b
+
+
+def setup_entropy_pooling(S, I, views):
+    R = synthetic_pnl(S, I)
+    A, b = mean_views(R, views)
+    p = np.ones((S, 1)) / S
+    return lambda: ft.entropy_pooling(p, A, b)
+
+
+def setup_entropy_pooling_pnl(views):
+    R = ft.load_pnl().values
+    A, b = mean_views(R, views)
+    p = np.ones((R.shape[0], 1)) / R.shape[0]
+    return lambda: ft.entropy_pooling(p, A, b)
+
+
+def setup_portfolio_cvar(S, I, portfolios):
+    R = synthetic_pnl(S, I)
+    e = np.random.default_rng(1).dirichlet(np.ones(I), portfolios).T
+    return lambda: ft.portfolio_cvar(e, R)
+
+
+def _mean_cvar(R, portfolios):
+    I = R.shape[1]
+    G = -np.eye(I)
+    h = np.zeros(I)
+    if portfolios == 1:
+        return lambda: ft.MeanCVaR(R, G, h).efficient_portfolio()
+    return lambda: ft.MeanCVaR(R, G, h).efficient_frontier(portfolios)
+
+
+def setup_mean_cvar(S, I, portfolios):
+    return _mean_cvar(synthetic_pnl(S, I), portfolios)
+
+
+def setup_mean_cvar_pnl(portfolios):
+    return _mean_cvar(ft.load_pnl().values, portfolios)
+
+
+def setup_ffr_simulate(T, I, S, H):
+    R = synthetic_pnl(T, I)
+    state_variable = np.abs(R[:, 0])
+    ffr = ft.FullyFlexibleResampling(R)
+    probabilities, states = ffr.compute_probabilities(
+        state_variable, np.percentile(state_variable, [25, 75]))
+    return lambda: ffr.simulate(S, H, probabilities, states, seed=0)
+
+
+def setup_exposure_stacking(I, B, L):
+    sample_portfolios = np.random.default_rng(2).dirichlet(np.ones(I), B).T
+    return lambda: ft.exposure_stacking(L, sample_portfolios)
+
+
+BENCHMARKS = {
+    'entropy_pooling': setup_entropy_pooling,
+    'entropy_pooling_pnl': setup_entropy_pooling_pnl,
+    'portfolio_cvar': setup_portfolio_cvar,
+    'mean_cvar': setup_mean_cvar,
+    'mean_cvar_pnl': setup_mean_cvar_pnl,
+    'ffr_simulate': setup_ffr_simulate,
+    'exposure_stacking': setup_exposure_stacking,
+}
+
+
+def measure(run, repeats):
+    run()  # warm-up, so lazy imports and first-call setup are not timed or traced
+    times = []
+    for _ in range(repeats):
+        start = perf_counter()
+        run()
+        times.append(perf_counter() - start)
+    tracemalloc.start()
+    run()
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return min(times), float(np.median(times)), peak_memory
+
+
+def environment():
+    versions = {}
+    for package in ('fortitudo.tech', 'numpy', 'scipy', 'pandas', 'cvxopt'):
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    return {'python': sys.version.split()[0], 'platform': platform.platform(),
+            'machine': platform.machine(), 'cpu_count': os.cpu_count(), 'versions': versions}
+
+
+def compare(results, baseline_path, threshold, benchmarks):
+    with open(baseline_path) as f:
+        baseline = {(r['benchmark'], json.dumps(r['params'], sort_keys=True)): r
+                    for r in json.load(f)['results']}
+    print(f'\nChanges relative to {baseline_path}:')
+    changes = 0
+    keys = set()
+    for result in results:
+        key = (result['benchmark'], json.dumps(result['params'], sort_keys=True))
+        keys.add(key)
+        if key not in baseline:
+            print(f'{key[0]:22s} {key[1]:55s}        ADDED')
+            changes += 1
+            continue
+        ratio = result['best_seconds'] / baseline[key]['best_seconds']
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = '  REGRESSION'
+            changes += 1
+        print(f'{key[0]:22s} {key[1]:55s} {ratio:6.2f}x time{flag}')
+    for key in baseline:
+        # Benchmarks that were deselected are skipped, but renamed ones are reported.
+        if key not in keys and (key[0] in benchmarks or key[0] not in BENCHMARKS):
+            print(f'{key[0]:22s} {key[1]:55s}        REMOVED')
+            changes += 1
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--preset', choices=list(PRESETS), default='small')
+    parser.add_argument('--benchmarks', nargs='+', choices=list(BENCHMARKS),
+                        default=list(BENCHMARKS))
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--output', help='Path of the JSON results file.')
+    parser.add_argument('--compare', help='Path of a previous JSON results file.')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='Relative slowdown reported as a regression.')
+    args = parser.parse_args()
+
+    results = []
+    for name in args.benchmarks:
+        for params in PRESETS[args.preset][name]:
+            run = BENCHMARKS[name](**params)
+            best, median, peak_memory = measure(run, args.repeats)
+            results.append({'benchmark': name, 'params': params, 'best_seconds': best,
+                            'median_seconds': median, 'peak_memory_bytes': peak_memory})
+            print(f'{name:22s} {json.dumps(params):55s} {best:9.4f}s '
+                  f'{peak_memory / 2**20:9.1f}MiB')
+
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump({'preset': args.preset, 'repeats': args.repeats,
+                       'environment': environment(), 'results': results}, f, indent=2)
+    if args.compare is not None and compare(
+            results, args.compare, args.threshold, args.benchmarks) > 0:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
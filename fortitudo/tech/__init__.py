@@ -14,10 +14,44 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
-from .data import load_pnl, load_parameters, load_risk_factors, load_time_series, plot_vol_surface
+from importlib import import_module
+
+# The function shares its name with its submodule, so it is imported eagerly to prevent
+# a later import of the submodule from shadowing it. All other attributes are imported
+# on first access, so matplotlib and cvxopt are only loaded when they are needed.
 from .entropy_pooling import entropy_pooling
-from .functions import (simulation_moments, covariance_matrix, correlation_matrix,
-                        portfolio_cvar, portfolio_var, portfolio_vol, exposure_stacking)
-from .optimization import cvar_options, MeanCVaR, MeanVariance
-from .option_pricing import forward, call_option, put_option
-from .simulation import FullyFlexibleResampling, exp_decay_probs, normal_exp_decay_calib
+
+_LAZY_ATTRIBUTES = {
+    'load_pnl': 'data', 'load_parameters': 'data', 'load_risk_factors': 'data',
+    'load_time_series': 'data', 'plot_vol_surface': 'data',
+    'simulation_moments': 'functions', 'covariance_matrix': 'functions',
+    'correlation_matrix': 'functions', 'portfolio_cvar': 'functions',
+    'portfolio_cml': 'functions', 'portfolio_var': 'functions', 'portfolio_vol': 'functions',
+    'exposure_stacking': 'functions',
+    'cvar_options': 'optimization', 'MeanCVaR': 'optimization', 'MeanCML': 'optimization',
+    'MeanVariance': 'optimization', 'EfficientFrontier': 'optimization',
+    'forward': 'option_pricing', 'call_option': 'option_pricing',
+    'put_option': 'option_pricing', 'option_prices': 'option_pricing',
+    'option_greeks': 'option_pricing', 'implied_volatility': 'option_pricing',
+    'option_pnl': 'repricing', 'ScenarioStore': 'scenario_store', 'Profiler': 'profiling',
+    'entropy_pooling_async': 'asynchronous', 'efficient_portfolio_async': 'asynchronous',
+    'efficient_frontier_async': 'asynchronous',
+    'FullyFlexibleResampling': 'simulation', 'ExpDecayEstimator': 'simulation',
+    'exp_decay_probs': 'simulation', 'normal_exp_decay_calib': 'simulation',
+    'normal_exp_decay_calib_grid': 'simulation'}
+
+__all__ = ['entropy_pooling', *_LAZY_ATTRIBUTES]
+
+
+def __getattr__(name: str):
+    if name in _LAZY_ATTRIBUTES.values():
+        return import_module(f'.{name}', __name__)
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(import_module(f'.{_LAZY_ATTRIBUTES[name]}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list:
+    return sorted(set(globals()) | set(__all__))
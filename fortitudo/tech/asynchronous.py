@@ -0,0 +1,116 @@
+# fortitudo.tech - Novel Investment Technologies.
+# Copyright (C) 2021-2025 Fortitudo Technologies.
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+import threading
+import numpy as np
+from concurrent.futures import Executor
+from functools import partial
+from typing import AsyncIterator, Union
+from .entropy_pooling import entropy_pooling
+from .optimization import MeanCVaR, MeanCML, MeanVariance
+from .profiling import _in_context
+
+
+def _cancel_kwargs(
+        optimization: Union[MeanCVaR, MeanCML, MeanVariance], cancel_event: threading.Event
+        ) -> dict:
+    """Function for passing a cancellation event to optimizations that support it."""
+    if isinstance(optimization, MeanCVaR):
+        return {'cancel_event': cancel_event}
+    return {}
+
+
+async def entropy_pooling_async(
+        p: np.ndarray, A: np.ndarray, b: np.ndarray, G: np.ndarray = None,
+        h: np.ndarray = None, method: str = None, executor: Executor = None) -> np.ndarray:
+    """Function for computing Entropy Pooling posterior probabilities in an executor.
+
+    Args:
+        p: Prior probability vector with shape (S, 1).
+        A: Equality constraint matrix with shape (M, S).
+        b: Equality constraint vector with shape (M, 1).
+        G: Inequality constraint matrix with shape (N, S).
+        h: Inequality constraint vector with shape (N, 1).
+        method: Optimization method: {'TNC', 'L-BFGS-B'}. Default 'TNC'.
+        executor: Executor that solves the problem. Default: the event loop's default.
+
+    Returns:
+        Posterior probability vector with shape (S, 1).
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        executor, _in_context(partial(entropy_pooling, p, A, b, G, h, method)))
+
+
+async def efficient_portfolio_async(
+        optimization: Union[MeanCVaR, MeanCML, MeanVariance], return_target: float = None,
+        executor: Executor = None) -> np.ndarray:
+    """Function for computing an efficient portfolio in an executor.
+
+    If the calling task is cancelled, the Benders algorithm of MeanCVaR and MeanCML
+    stops before its next iteration, so the executor is released promptly.
+
+    Args:
+        optimization: Optimization object.
+        return_target: Return target for the efficient portfolio.
+            The minimum risk portfolio is computed by default.
+        executor: Executor that solves the problem. Default: the event loop's default.
+
+    Returns:
+        Efficient portfolio exposures with shape (I, 1).
+    """
+    loop = asyncio.get_running_loop()
+    cancel_event = threading.Event()
+    try:
+        return await loop.run_in_executor(executor, _in_context(partial(
+            optimization.efficient_portfolio, return_target,
+            **_cancel_kwargs(optimization, cancel_event))))
+    finally:
+        cancel_event.set()
+
+
+async def efficient_frontier_async(
+        optimization: Union[MeanCVaR, MeanCML, MeanVariance], num_portfolios: int = None,
+        executor: Executor = None) -> AsyncIterator[np.ndarray]:
+    """Function for streaming the efficient frontier portfolios from an executor.
+
+    The portfolios are yielded as soon as they are computed, starting with the minimum
+    risk portfolio and ending with the highest expected return portfolio. If the calling
+    task is cancelled or stops iterating, the remaining portfolios are not computed.
+
+    Args:
+        optimization: Optimization object.
+        num_portfolios: Number of portfolios used to span the efficient frontier. Default: 9.
+        executor: Executor that solves the problems. Default: the event loop's default.
+
+    Returns:
+        Asynchronous iterator over the efficient portfolios with shape (I, 1).
+
+    Raises:
+        ValueError: If expected return is unbounded.
+    """
+    if num_portfolios is None:
+        num_portfolios = 9
+    loop = asyncio.get_running_loop()
+    cancel_event = threading.Event()
+    portfolios = optimization._frontier_portfolios(
+        num_portfolios, **_cancel_kwargs(optimization, cancel_event))
+    try:
+        for _ in range(num_portfolios):
+            yield await loop.run_in_executor(executor, _in_context(next), portfolios)
+    finally:
+        cancel_event.set()
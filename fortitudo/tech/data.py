@@ -14,27 +14,86 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import os
 import numpy as np
 import pandas as pd
-from matplotlib import cm
-from matplotlib.figure import Figure
-from matplotlib.axes import Axes
-import matplotlib.pyplot as plt
 
 from pkgutil import get_data
 from io import StringIO
-from typing import Tuple
+from typing import Tuple, Union, TYPE_CHECKING
 
+if TYPE_CHECKING:  # pragma: no cover
+    from matplotlib.figure import Figure
+    from matplotlib.axes import Axes
 
-def load_pnl() -> pd.DataFrame:
+
+def _read_csv(name: str) -> pd.DataFrame:
+    """Function for parsing a bundled csv dataset."""
+    return pd.read_csv(StringIO(get_data('fortitudo.tech', f'data/{name}.csv').decode()))
+
+
+def _cached_dataset(name: str, cache_dir: str) -> Tuple[np.ndarray, list]:
+    """Function for memory-mapping a bundled dataset from its binary cache.
+
+    The cache is keyed by the size and modification time of the csv file, so it is
+    rebuilt when the bundled data changes. The values keep the column-major layout of
+    the parsed DataFrame, so computations on cached and parsed data are identical.
+
+    Args:
+        name: Dataset name.
+        cache_dir: Directory for the cache files. Default: the user cache directory.
+
+    Returns:
+        Copy-on-write memory-mapped values as an ndarray view and column names.
+    """
+    csv_stat = os.stat(os.path.join(os.path.dirname(__file__), 'data', f'{name}.csv'))
+    if cache_dir is None:
+        cache_dir = os.path.join(os.environ.get(
+            'XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache')), 'fortitudo.tech')
+    prefix = os.path.join(cache_dir, f'{name}_{csv_stat.st_size}_{csv_stat.st_mtime_ns}')
+    values_path = f'{prefix}.npy'
+    columns_path = f'{prefix}_columns.npy'
+
+    if not (os.path.exists(values_path) and os.path.exists(columns_path)):
+        data = _read_csv(name)
+        os.makedirs(cache_dir, exist_ok=True)
+        for path, array in ((columns_path, np.array(list(data.columns), dtype=str)),
+                            (values_path, data.values)):
+            tmp_path = f'{path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                np.save(f, array)
+            os.replace(tmp_path, path)
+    values = np.load(values_path, mmap_mode='c').view(np.ndarray)
+    return values, np.load(columns_path).tolist()
+
+
+def _load_dataset(
+        name: str, as_numpy: bool, cache_dir: str) -> Union[pd.DataFrame, np.ndarray]:
+    """Function for loading a bundled dataset, falling back to parsing the csv file if
+    the binary cache cannot be used."""
+    try:
+        values, columns = _cached_dataset(name, cache_dir)
+    except OSError:
+        data = _read_csv(name)
+        return data.values if as_numpy else data
+    if as_numpy:
+        return values
+    return pd.DataFrame(values, columns=columns, copy=False)
+
+
+def load_pnl(
+        as_numpy: bool = None, cache_dir: str = None) -> Union[pd.DataFrame, np.ndarray]:
     """Function for loading the P&L simulation from https://ssrn.com/abstract=3936392,
     https://ssrn.com/abstract=4217884, and https://ssrn.com/abstract=4444291.
 
+    Args:
+        as_numpy: Return a numpy array instead of a DataFrame. Default: False.
+        cache_dir: Directory for the binary cache. Default: the user cache directory.
+
     Returns:
         P&L simulation.
     """
-    pnl_string = StringIO(get_data('fortitudo.tech', 'data/pnl.csv').decode())
-    return pd.read_csv(pnl_string)
+    return _load_dataset('pnl', as_numpy, cache_dir)
 
 
 def load_parameters() -> Tuple[list, np.ndarray, np.ndarray]:
@@ -54,30 +113,38 @@ def load_parameters() -> Tuple[list, np.ndarray, np.ndarray]:
     return instrument_names, means, covariance_matrix
 
 
-def load_risk_factors() -> pd.DataFrame:
+def load_risk_factors(
+        as_numpy: bool = None, cache_dir: str = None) -> Union[pd.DataFrame, np.ndarray]:
     """Function for loading the risk factor simulation from 7_RiskFactorViews.ipynb that is used
     in https://ssrn.com/abstract=4444291.
 
+    Args:
+        as_numpy: Return a numpy array instead of a DataFrame. Default: False.
+        cache_dir: Directory for the binary cache. Default: the user cache directory.
+
     Returns:
         Risk factor simulation.
     """
-    rf_string = StringIO(get_data('fortitudo.tech', 'data/risk_factors.csv').decode())
-    return pd.read_csv(rf_string)
+    return _load_dataset('risk_factors', as_numpy, cache_dir)
 
 
-def load_time_series() -> pd.DataFrame:
+def load_time_series(
+        as_numpy: bool = None, cache_dir: str = None) -> Union[pd.DataFrame, np.ndarray]:
     """Function for loading an SDE based time series simulation.
 
+    Args:
+        as_numpy: Return a numpy array instead of a DataFrame. Default: False.
+        cache_dir: Directory for the binary cache. Default: the user cache directory.
+
     Returns:
         Time series simulation.
     """
-    ts_string = StringIO(get_data('fortitudo.tech', 'data/time_series.csv').decode())
-    return pd.read_csv(ts_string)
+    return _load_dataset('time_series', as_numpy, cache_dir)
 
 
 def plot_vol_surface(
         index: int, vol_surface: np.ndarray, figsize: Tuple[float, float] = None,
-        zoom: float = None) -> Tuple[Figure, Axes]:
+        zoom: float = None) -> Tuple['Figure', 'Axes']:
     """Function for plotting the implied vol surface from the time series simulation.
 
     Args:
@@ -88,6 +155,9 @@ def plot_vol_surface(
     Returns:
         3d implied vol surface plot.
     """
+    from matplotlib import cm
+    import matplotlib.pyplot as plt
+
     if figsize is None:
         figsize = (10, 7)
     if zoom is None:
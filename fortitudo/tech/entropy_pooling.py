@@ -16,7 +16,12 @@
 
 import numpy as np
 from scipy.optimize import minimize, Bounds
+from time import perf_counter
 from typing import Tuple
+from .profiling import _profiled, _record
+
+_DUAL_CHUNK_SIZE = 10000
+_POLISH_ITERATIONS = 5
 
 
 def entropy_pooling(
@@ -24,6 +29,9 @@ def entropy_pooling(
         h: np.ndarray = None, method: str = None) -> np.ndarray:
     """Function for computing Entropy Pooling posterior probabilities.
 
+    A and G can be stored as float32 to halve their memory use. The dual problem is
+    still evaluated with float64 accumulation.
+
     Args:
         p: Prior probability vector with shape (S, 1).
         A: Equality constraint matrix with shape (M, S).
@@ -51,14 +59,162 @@ def entropy_pooling(
         len_h = len(h)
         bounds = Bounds([-np.inf] * len_b + [0] * len_h, [np.inf] * (len_b + len_h))
 
-    log_p = np.log(p)
+    return _entropy_pooling(np.log(p), lhs, rhs, bounds, method)[0]
+
+
+def _entropy_pooling(
+        log_p: np.ndarray, lhs: np.ndarray, rhs: np.ndarray, bounds: Bounds,
+        method: str, x0: np.ndarray = None, polish: bool = False
+        ) -> Tuple[np.ndarray, np.ndarray]:
+    """Function solving the Entropy Pooling dual problem.
+
+    Args:
+        log_p: Log of prior probability vector with shape (S, 1).
+        lhs: Matrix with shape (M, S) or (M + N, S).
+        rhs: Vector with shape (M, 1) or (M + N, 1).
+        bounds: Bounds for the Lagrange multipliers.
+        method: Optimization method: {'TNC', 'L-BFGS-B'}.
+        x0: Initial Lagrange multipliers with shape (M,) or (M + N,). The solver is
+            restarted from zeros if it does not converge from x0. Default: zeros.
+        polish: Whether to refine the solution with Newton steps, so that solutions
+            found from different initial multipliers agree. Default: False.
+
+    Returns:
+        Posterior probability vector with shape (S, 1) and Lagrange multipliers.
+    """
+    if x0 is not None:
+        with np.errstate(over='ignore', invalid='ignore'):
+            if not np.isfinite(_dual_objective(x0, log_p, lhs, rhs)[0]):
+                x0 = None
+
+    start_time = perf_counter()
     dual_solution = minimize(
-        _dual_objective, x0=np.zeros(lhs.shape[0]), args=(log_p, lhs, rhs),
+        _dual_objective, x0=np.zeros(lhs.shape[0]) if x0 is None else x0,
+        args=(log_p, lhs, rhs),
         method=method, jac=True, bounds=bounds, options={'maxfun': 10000})
-    q = np.exp(log_p - 1 - lhs.T @ dual_solution.x[:, np.newaxis])
-    return q
+    _record('scipy.minimize', perf_counter() - start_time, iterations=dual_solution.nit)
+    if x0 is not None and not dual_solution.success:
+        return _entropy_pooling(log_p, lhs, rhs, bounds, method, polish=polish)
+
+    lagrange_multipliers = dual_solution.x
+    if polish:
+        lagrange_multipliers = _newton_polish(lagrange_multipliers, log_p, lhs, rhs, bounds)
+    q = _posterior_terms(lagrange_multipliers[:, np.newaxis], log_p, lhs)[1]
+    return q, lagrange_multipliers
+
+
+def _newton_polish(
+        lagrange_multipliers: np.ndarray, log_p: np.ndarray, lhs: np.ndarray,
+        rhs: np.ndarray, bounds: Bounds) -> np.ndarray:
+    """Function refining a dual solution with safeguarded Newton steps.
+
+    The solvers stop when the dual objective stagnates or the line search fails, so
+    solutions found from different initial multipliers differ by the solver tolerance.
+    Newton steps on the multipliers that are not held at their bounds remove this
+    dependence on the initial multipliers. Steps are only accepted if they reduce the
+    largest gradient element.
+
+    Args:
+        lagrange_multipliers: Lagrange multipliers with shape (M,) or (M + N,).
+        log_p: Log of prior probability vector with shape (S, 1).
+        lhs: Matrix with shape (M, S) or (M + N, S).
+        rhs: Vector with shape (M, 1) or (M + N, 1).
+        bounds: Bounds for the Lagrange multipliers.
+
+    Returns:
+        Refined Lagrange multipliers.
+    """
+    x, gradient, free = _polish_terms(lagrange_multipliers, log_p, lhs, rhs, bounds)
+    for _ in range(_POLISH_ITERATIONS):
+        hessian = _dual_hessian(x, lhs)[np.ix_(free, free)]
+        step = np.zeros_like(lagrange_multipliers)
+        step[free] = np.linalg.lstsq(hessian, gradient[free], rcond=None)[0]
+        candidate = np.clip(lagrange_multipliers - step, bounds.lb, bounds.ub)
+        with np.errstate(over='ignore', invalid='ignore'):
+            candidate_terms = _polish_terms(candidate, log_p, lhs, rhs, bounds)
+        if not (np.max(np.abs(candidate_terms[1][candidate_terms[2]]), initial=0)
+                < np.max(np.abs(gradient[free]), initial=0)):
+            break
+        lagrange_multipliers = candidate
+        x, gradient, free = candidate_terms
+    return lagrange_multipliers
+
+
+def _polish_terms(
+        lagrange_multipliers: np.ndarray, log_p: np.ndarray, lhs: np.ndarray,
+        rhs: np.ndarray, bounds: Bounds) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Function computing the posterior, dual gradient / 1000, and free multipliers.
+
+    Args:
+        lagrange_multipliers: Lagrange multipliers with shape (M,) or (M + N,).
+        log_p: Log of prior probability vector with shape (S, 1).
+        lhs: Matrix with shape (M, S) or (M + N, S).
+        rhs: Vector with shape (M, 1) or (M + N, 1).
+        bounds: Bounds for the Lagrange multipliers.
+
+    Returns:
+        Posterior with shape (S, 1), gradient, and boolean array of multipliers that are
+        not held at their lower bounds.
+    """
+    _, x, lhs_x = _posterior_terms(lagrange_multipliers[:, np.newaxis], log_p, lhs)
+    gradient = (rhs - lhs_x)[:, 0]
+    free = (lagrange_multipliers > bounds.lb) | (gradient < 0)
+    return x, gradient, free
+
+
+def _dual_hessian(x: np.ndarray, lhs: np.ndarray) -> np.ndarray:
+    """Function computing the Hessian lhs @ diag(x) @ lhs.T of the dual objective / 1000.
+
+    Args:
+        x: Posterior probability vector with shape (S, 1).
+        lhs: Matrix with shape (M, S) or (M + N, S).
+
+    Returns:
+        Hessian with shape (M, M) or (M + N, M + N).
+    """
+    if np.result_type(lhs, np.float32) == np.float64:
+        return (lhs * x.T) @ lhs.T
+
+    hessian = np.zeros((lhs.shape[0], lhs.shape[0]))
+    for start in range(0, lhs.shape[1], _DUAL_CHUNK_SIZE):
+        end = start + _DUAL_CHUNK_SIZE
+        lhs_chunk = lhs[:, start:end].astype(np.float64)
+        hessian += (lhs_chunk * x[start:end].T) @ lhs_chunk.T
+    return hessian
+
+
+def _posterior_terms(
+        lagrange_multipliers: np.ndarray, log_p: np.ndarray,
+        lhs: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Function computing the log posterior, posterior, and constraint values.
+
+    Constraint matrices stored with reduced precision, e.g., float32, are converted to
+    float64 in chunks of scenarios, so a float64 copy of lhs is never held in memory.
+
+    Args:
+        lagrange_multipliers: Lagrange multipliers with shape (M, 1) or (M + N, 1).
+        log_p: Log of prior probability vector with shape (S, 1).
+        lhs: Matrix with shape (M, S) or (M + N, S).
+
+    Returns:
+        Log posterior and posterior with shape (S, 1) and lhs @ posterior.
+    """
+    if np.result_type(lhs, np.float32) == np.float64:
+        log_x = log_p - 1 - lhs.T @ lagrange_multipliers
+        x = np.exp(log_x)
+        return log_x, x, lhs @ x
+
+    log_x = np.empty(log_p.shape)
+    lhs_x = np.zeros((lhs.shape[0], 1))
+    for start in range(0, lhs.shape[1], _DUAL_CHUNK_SIZE):
+        end = start + _DUAL_CHUNK_SIZE
+        lhs_chunk = lhs[:, start:end].astype(np.float64)
+        log_x[start:end] = log_p[start:end] - 1 - lhs_chunk.T @ lagrange_multipliers
+        lhs_x += lhs_chunk @ np.exp(log_x[start:end])
+    return log_x, np.exp(log_x), lhs_x
 
 
+@_profiled
 def _dual_objective(
         lagrange_multipliers: np.ndarray, log_p: np.ndarray,
         lhs: np.ndarray, rhs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
@@ -74,8 +230,7 @@ def _dual_objective(
         Dual objective value and gradient.
     """
     lagrange_multipliers = lagrange_multipliers[:, np.newaxis]
-    log_x = log_p - 1 - lhs.T @ lagrange_multipliers
-    x = np.exp(log_x)
-    gradient = rhs - lhs @ x
+    log_x, x, lhs_x = _posterior_terms(lagrange_multipliers, log_p, lhs)
+    gradient = rhs - lhs_x
     objective = x.T @ (log_x - log_p) - lagrange_multipliers.T @ gradient
     return -1000 * objective, 1000 * gradient
@@ -17,12 +17,11 @@
 import numpy as np
 import pandas as pd
 from copy import copy
-from cvxopt import matrix
-from cvxopt.solvers import qp
 from typing import Tuple, Union
 
 
 cvar_tol = 1e-8
+_ACCUMULATION_CHUNK_SIZE = 10000
 
 
 def _simulation_check(
@@ -51,6 +50,28 @@ def _simulation_check(
     return simulation_names, R, p
 
 
+def _expectation(p: np.ndarray, R: np.ndarray) -> np.ndarray:
+    """Function for computing probability weighted sums with float64 accumulation.
+
+    Scenario matrices stored with reduced precision, e.g., float32, are converted to
+    float64 in chunks of scenarios, so a float64 copy of R is never held in memory.
+
+    Args:
+        p: probability vector with shape (S, 1).
+        R: P&L / risk factor simulation with shape (S, I).
+
+    Returns:
+        Probability weighted sums p.T @ R with shape (1, I).
+    """
+    if np.result_type(R, np.float32) == np.float64:
+        return p.T @ R
+    expectation = np.zeros((1, R.shape[1]))
+    for start in range(0, R.shape[0], _ACCUMULATION_CHUNK_SIZE):
+        end = start + _ACCUMULATION_CHUNK_SIZE
+        expectation += p[start:end].T @ R[start:end].astype(np.float64)
+    return expectation
+
+
 def simulation_moments(R: Union[pd.DataFrame, np.ndarray], p: np.ndarray = None) -> pd.DataFrame:
     """Function for computing simulation moments (mean, volatility, skewness, and kurtosis).
 
@@ -62,12 +83,13 @@ def simulation_moments(R: Union[pd.DataFrame, np.ndarray], p: np.ndarray = None)
         DataFrame with shape (I, 4) containing simulation moments.
     """
     simulation_names, R, p = _simulation_check(R, p)
-    means = p.T @ R
-    R_demean = R - means
-    vols = np.sqrt(p.T @ R_demean**2)
-    R_standardized = R_demean / vols
-    skews = p.T @ R_standardized**3
-    kurts = p.T @ R_standardized**4
+    dtype = np.result_type(R, np.float32)
+    means = _expectation(p, R)
+    R_demean = R - means.astype(dtype)
+    vols = np.sqrt(_expectation(p, R_demean**2))
+    R_standardized = R_demean / vols.astype(dtype)
+    skews = _expectation(p, R_standardized**3)
+    kurts = _expectation(p, R_standardized**4)
     results = pd.DataFrame(np.hstack((means.T, vols.T, skews.T, kurts.T)),
                            index=simulation_names,
                            columns=['Mean', 'Volatility', 'Skewness', 'Kurtosis'])
@@ -85,7 +107,16 @@ def covariance_matrix(R: Union[pd.DataFrame, np.ndarray], p: np.ndarray = None)
         Covariance matrix with shape (I, I).
     """
     simulation_names, R, p = _simulation_check(R, p)
-    cov = np.cov(R, rowvar=False, aweights=p[:, 0])
+    if np.result_type(R, np.float32) == np.float64:
+        cov = np.cov(R, rowvar=False, aweights=p[:, 0])
+    else:
+        means = _expectation(p, R) / np.sum(p)
+        cov = np.zeros((R.shape[1], R.shape[1]))
+        for start in range(0, R.shape[0], _ACCUMULATION_CHUNK_SIZE):
+            end = start + _ACCUMULATION_CHUNK_SIZE
+            R_demean = R[start:end].astype(np.float64) - means
+            cov += R_demean.T @ (p[start:end] * R_demean)
+        cov /= np.sum(p) - np.sum(p**2) / np.sum(p)
     return pd.DataFrame(cov, index=enumerate(simulation_names))
 
 
@@ -105,7 +136,7 @@ def correlation_matrix(R: Union[pd.DataFrame, np.ndarray], p: np.ndarray = None)
     return pd.DataFrame(corr, index=cov.index)
 
 
-def _var_cvar_preprocess(e, R, p, alpha, demean) -> Tuple[np.ndarray, np.ndarray, float]:
+def _alpha_demean_check(alpha, demean) -> Tuple[float, bool]:
     if alpha is None:
         alpha = 0.95
     elif type(alpha) is not float or not 0 < alpha < 1:
@@ -116,10 +147,16 @@ def _var_cvar_preprocess(e, R, p, alpha, demean) -> Tuple[np.ndarray, np.ndarray
     elif type(demean) is not bool:
         raise ValueError('demean must be either True or False.')
 
+    return alpha, demean
+
+
+def _var_cvar_preprocess(e, R, p, alpha, demean) -> Tuple[np.ndarray, np.ndarray, float]:
+    alpha, demean = _alpha_demean_check(alpha, demean)
     _, R, p = _simulation_check(R, p)
+    dtype = np.result_type(R, np.float32)
     if demean:
-        R = R - p.T @ R
-    pf_pnl = R @ e
+        R = R - _expectation(p, R).astype(dtype)
+    pf_pnl = R @ e.astype(dtype)
 
     return pf_pnl, p, alpha
 
@@ -140,6 +177,11 @@ def portfolio_cvar(
         Portfolio alpha-CVaR.
     """
     pf_pnl, p, alpha = _var_cvar_preprocess(e, R, p, alpha, demean)
+    cvar = _cvar_calc(pf_pnl, p, alpha)
+    return _return_portfolio_risk(cvar)
+
+
+def _cvar_calc(pf_pnl: np.ndarray, p: np.ndarray, alpha: float) -> np.ndarray:
     losses = -pf_pnl
     num_portfolios = pf_pnl.shape[1]
     cvar = np.full((1, num_portfolios), np.nan)
@@ -152,7 +194,37 @@ def portfolio_cvar(
         cvar[0, port] = ((losses_sorted[:var_index] @ p[worst_losses_inds][:var_index]
                           + (1 - alpha - probs_total) * losses_sorted[var_index])
                          / (1 - alpha))[0]
-    return _return_portfolio_risk(cvar)
+    return cvar
+
+
+def portfolio_cml(
+        e: np.ndarray, R: np.ndarray, p: np.ndarray = None,
+        alpha: float = None, demean: bool = None) -> Union[float, np.ndarray]:
+    """Function for computing portfolio Conditional Maximum Loss (CML).
+
+    The CML is the CVaR of the maximum cumulative loss along each path.
+
+    Args:
+        e: Vector / matrix of portfolio exposures with shape (I, num_portfolios).
+        R: Cumulative P&L path simulation with shape (S, I, H).
+        p: probability vector with shape (S, 1). Default np.ones((S, 1)) / S.
+        alpha: alpha level for alpha-CML. Default: 0.95.
+        demean: Boolean indicating whether to use demeaned P&L. Default: True.
+
+    Returns:
+        Portfolio alpha-CML.
+    """
+    alpha, demean = _alpha_demean_check(alpha, demean)
+    _, R, p = _simulation_check(R, p)
+    dtype = np.result_type(R, np.float32)
+    max_losses = np.zeros((R.shape[0], e.shape[1]))
+    for h in range(R.shape[2]):
+        pf_pnl = R[:, :, h] @ e.astype(dtype)
+        if demean:
+            pf_pnl = pf_pnl - _expectation(p, pf_pnl).astype(dtype)
+        np.maximum(max_losses, -pf_pnl, out=max_losses)
+    cml = _cvar_calc(-max_losses, p, alpha)
+    return _return_portfolio_risk(cml)
 
 
 def _var_calc(pf_pnl: np.ndarray, p: np.ndarray, alpha: float) -> np.ndarray:
@@ -185,18 +257,28 @@ def portfolio_var(
 
 
 def portfolio_vol(
-        e: np.ndarray, R: Union[pd.DataFrame, np.ndarray],
+        e: np.ndarray,
+        R: Union[pd.DataFrame, np.ndarray, Tuple[np.ndarray, np.ndarray, np.ndarray]],
         p: np.ndarray = None) -> Union[float, np.ndarray]:
     """Function for computing portfolio volatility.
 
     Args:
         e: Vector / matrix of portfolio exposures with shape (I, num_portfolios).
-        R: P&L / risk factor simulation with shape (S, I).
+        R: P&L / risk factor simulation with shape (S, I) or factor model tuple
+            (B, Sigma_f, D) with factor loadings B with shape (I, K), factor covariance
+            matrix Sigma_f with shape (K, K), and specific variances D with shape (I,).
         p: probability vector with shape (S, 1). Default: np.ones((S, 1)) / S.
 
     Returns:
         Portfolio volatility / volatilities.
     """
+    if isinstance(R, tuple):
+        factor_loadings, factor_covariance, specific_variances = R
+        factor_exposures = factor_loadings.T @ e
+        variances = (np.sum(factor_exposures * (factor_covariance @ factor_exposures), axis=0)
+                     + specific_variances @ e**2)
+        return _return_portfolio_risk(np.sqrt(variances)[np.newaxis, :])
+
     cov = covariance_matrix(R, p).values
     num_portfolios = e.shape[1]
     vol = np.full((1, num_portfolios), np.nan)
@@ -222,6 +304,9 @@ def exposure_stacking(L, sample_portfolios):
     Returns:
         Exposure Stacking portfolio.
     """
+    from cvxopt import matrix
+    from cvxopt.solvers import qp
+
     B = sample_portfolios.shape[1]
     partition_size = B // L  # size of validation set for all except possibly the last
     indices = np.arange(0, B)
@@ -244,5 +329,5 @@ def exposure_stacking(L, sample_portfolios):
     b = matrix(np.array([[1.]]))
     G = matrix(-np.identity(B))
     h = matrix(np.zeros((B, 1)))
-    w = qp(P, q, G, h, A, b)['x']
+    w = qp(P, q, G, h, A, b, options={'show_progress': False})['x']
     return np.squeeze(M.T @ w)
@@ -14,11 +14,16 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import threading
 import numpy as np
-from cvxopt import sparse, matrix
+from concurrent.futures import CancelledError
+from cvxopt import sparse, matrix, spdiag
 from cvxopt.solvers import lp, qp, options
-from typing import Tuple
+from typing import Tuple, Union, Iterator
 from copy import copy
+from time import perf_counter
+from .functions import _cvar_calc, _expectation, portfolio_vol
+from .profiling import _profiled, _record
 
 options['glpk'] = {'msg_lev': 'GLP_MSG_OFF'}
 options['show_progress'] = False
@@ -26,6 +31,7 @@ cvar_options = {}
 
 
 class Optimization:
+    @_profiled
     def _calculate_max_expected_return(self, feasibility_check: bool = False) -> float:
         """Method for calculating the highest expected return / checking feasibility.
 
@@ -41,7 +47,7 @@ class Optimization:
         if feasibility_check:
             c = matrix(np.zeros(self._G.size[1]))
         else:
-            c = self._expected_return_row.T
+            c = matrix(self._expected_return_row.T)
 
         solution = lp(c, self._G, self._h, self._A, self._b, solver='glpk')
         if solution['status'] == 'optimal':
@@ -66,16 +72,52 @@ class Optimization:
         if num_portfolios is None:
             num_portfolios = 9
         frontier = np.full((self._I, num_portfolios), np.nan)
-        frontier[:, 0] = self.efficient_portfolio()[:, 0]
+        for idx, portfolio in enumerate(self._frontier_portfolios(num_portfolios)):
+            frontier[:, idx] = portfolio[:, 0]
+        return frontier
+
+    def _frontier_portfolios(self, num_portfolios: int, **kwargs: dict) -> Iterator[np.ndarray]:
+        """Method for computing the efficient frontier portfolios one at a time.
+
+        Args:
+            num_portfolios: Number of portfolios used to span the efficient frontier.
+            kwargs: Keyword arguments for the efficient_portfolio method.
+
+        Returns:
+            Iterator over the efficient portfolios with shape (I, 1) in the order of
+            increasing expected return.
+
+        Raises:
+            ValueError: If expected return is unbounded.
+        """
+        min_risk_portfolio, max_expected_return = self._frontier_endpoints(**kwargs)
+        yield min_risk_portfolio
 
-        min_expected_return = self._mean @ frontier[:, 0]
-        max_expected_return = self._calculate_max_expected_return()
+        min_expected_return = self._mean @ min_risk_portfolio[:, 0]
         delta = (max_expected_return - min_expected_return) / (num_portfolios - 1)
         return_target_vector = min_expected_return + delta * np.arange(1, num_portfolios)
+        for return_target in return_target_vector:
+            yield self.efficient_portfolio(return_target, **kwargs)
 
-        for idx, return_target in enumerate(return_target_vector, 1):
-            frontier[:, idx] = self.efficient_portfolio(return_target)[:, 0]
-        return frontier
+    def _frontier_endpoints(self, **kwargs: dict) -> Tuple[np.ndarray, float]:
+        """Method for computing the minimum risk portfolio and the highest expected return.
+
+        The endpoints only depend on the problem specification, so they are computed
+        once and reused by subsequent efficient frontier computations.
+
+        Args:
+            kwargs: Keyword arguments for the efficient_portfolio method.
+
+        Returns:
+            Minimum risk portfolio with shape (I, 1) and highest expected return.
+
+        Raises:
+            ValueError: If expected return is unbounded.
+        """
+        if self._endpoints is None:
+            self._endpoints = (
+                self.efficient_portfolio(**kwargs), self._calculate_max_expected_return())
+        return self._endpoints
 
 
 class MeanCVaR(Optimization):
@@ -97,13 +139,19 @@ class MeanCVaR(Optimization):
     Raises:
         ValueError: If constraints or options parameters are infeasible.
     """
+    _scenario_dimensions = 2
+
+    @_profiled
     def __init__(
             self, R: np.ndarray, G: np.ndarray = None, h: np.ndarray = None,
             A: np.ndarray = None, b: np.ndarray = None, v: np.ndarray = None,
             p: np.ndarray = None, alpha: float = None, **kwargs: dict):
 
         self._set_options(kwargs.get('options', globals()['cvar_options']))
-        self._S, self._I = R.shape
+        if R.ndim != self._scenario_dimensions:
+            raise ValueError(
+                f'R must have {self._scenario_dimensions} dimensions, given shape {R.shape}.')
+        self._S, self._I = R.shape[0:2]
 
         if v is None:
             self._v = np.hstack((np.ones((1, self._I)), np.zeros((1, 2))))
@@ -140,12 +188,27 @@ class MeanCVaR(Optimization):
             raise ValueError('alpha must be a float in the interval (0, 1).')
 
         self._c = matrix(np.hstack((np.zeros(self._I), [1], [1 / (1 - self._alpha)])))
-        self._mean = self._p @ R
+        self._mean, self._losses = self._scenario_losses(R)
         self._expected_return_row = matrix(np.hstack((-self._mean, np.zeros((1, 2)))))
+        self._endpoints = None
+
+    def _scenario_losses(self, R: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Method for computing the expected returns and the scaled scenario losses.
+
+        Args:
+            R: Matrix with P&L simulations and shape (S, I).
+
+        Returns:
+            Expected returns with shape (1, I) and losses with shape (S, I).
+        """
+        mean = _expectation(self._p.T, R)
+        losses = np.empty(R.shape, dtype=self._dtype)
         if self._demean:
-            self._losses = -self._R_scalar * (R - self._mean)
+            np.subtract(R, mean, out=losses, casting='same_kind')
         else:
-            self._losses = -self._R_scalar * R
+            losses[:] = R
+        losses *= -self._R_scalar
+        return mean, losses
 
     def _set_options(self, options: dict):
         """Method for setting Benders algorithm parameters.
@@ -168,32 +231,81 @@ class MeanCVaR(Optimization):
         self._abstol = options.get('abstol', 1e-8)
         if not 1e-8 <= self._abstol <= 1e-4:
             raise ValueError('abstol must be in [1e-8, 1e-4].')
-
-    def _benders_algorithm(self, G: sparse, h: matrix) -> np.ndarray:
+        self._time_limit = options.get('time_limit', None)
+        if self._time_limit is not None and (
+                type(self._time_limit) not in (int, float) or self._time_limit <= 0):
+            raise ValueError('time_limit must be None or a positive integer or float.')
+        try:
+            self._dtype = np.dtype(options.get('dtype', 'float64'))
+        except TypeError:
+            self._dtype = None
+        if self._dtype not in (np.float32, np.float64):
+            raise ValueError("dtype must be either 'float32' or 'float64'.")
+
+    @_profiled
+    def _benders_algorithm(
+            self, G: sparse, h: matrix, cancel_event: threading.Event = None
+            ) -> Tuple[np.ndarray, dict]:
         """Method for running Benders algorithm.
 
+        The algorithm keeps track of the solution with the best upper bound, so it
+        can be stopped early due to the time limit and still return the best
+        solution found within the time budget. The upper bounds in the trace are the
+        Rockafellar-Uryasev objective values of the master problem solutions, while the
+        reported upper bound is the risk of the returned solution.
+
         Args:
             G: Inequality constraints matrix with shape (N, I) or (N+1, I).
             h: Inequality constraints vector with shape (N, 1) or (N+1, I).
+            cancel_event: Event that is checked before every iteration. Default: None.
 
         Returns:
-            Solution to the mean-CVaR optimization problem.
+            Solution to the mean-CVaR optimization problem and solution info.
+
+        Raises:
+            CancelledError: If cancel_event is set.
         """
-        eta = self._p @ self._losses
-        p = 1
-        solution, w, F_lower, G_benders, h_benders, eta, p = self._benders_main(G, h, eta, p)
-        F_star = F_lower + self._c[-1] * (w - solution[-1])
-        v = 1
-        while self._benders_stopping_criteria(F_star, F_lower) and v <= self._maxiter:
-            solution, w, F_lower, G_benders, h_benders, eta, p = self._benders_main(
+        start_time = perf_counter()
+        trace = {'lower_bound': [], 'upper_bound': [], 'lp_time': []}
+        eta, p = self._benders_initial_cut()
+        G_benders, h_benders = G, h
+        F_lower, F_star = None, np.inf
+        status = 'optimal'
+        v = 0
+        while v == 0 or self._benders_stopping_criteria(F_star, F_lower):
+            if cancel_event is not None and cancel_event.is_set():
+                raise CancelledError('The Benders algorithm was cancelled.')
+            if v > self._maxiter:
+                status = 'maxiter'
+                break
+            elif (v > 0 and self._time_limit is not None
+                  and perf_counter() - start_time > self._time_limit):
+                status = 'time_limit'
+                break
+            solution, w, F_lower, G_benders, h_benders, eta, p, lp_time = self._benders_main(
                 G_benders, h_benders, eta, p)
-            F_star = min(F_lower + self._c[-1] * (w - solution[-1]), F_star)
+            F = F_lower + self._c[-1] * (w - solution[-1])
+            if F < F_star:
+                F_star = F
+                best_solution = solution
+            trace['lower_bound'].append(float(F_lower[0, 0]) / self._R_scalar)
+            trace['upper_bound'].append(float(F_star[0, 0]) / self._R_scalar)
+            trace['lp_time'].append(lp_time)
             v += 1
-        return solution
+        _record(f'{type(self).__name__}._benders_algorithm', calls=0, iterations=v)
+
+        risk = self._portfolio_risk(best_solution[0:self._I])
+        info = {'status': status, 'iterations': v,
+                'lower_bound': trace['lower_bound'][-1], 'upper_bound': risk,
+                'gap': risk - trace['lower_bound'][-1],
+                'time': perf_counter() - start_time,
+                'trace': {key: np.array(value) for key, value in trace.items()}}
+        return best_solution, info
 
+    @_profiled
     def _benders_main(
             self, G_benders: sparse, h_benders: matrix, eta: np.ndarray, p: float
-            ) -> Tuple[np.ndarray, float, float, sparse, matrix, np.ndarray, float]:
+            ) -> Tuple[np.ndarray, float, float, sparse, matrix, np.ndarray, float, float]:
         """Method for solving the current relaxed master problem and updating cut.
 
         Args:
@@ -203,17 +315,29 @@ class MeanCVaR(Optimization):
             p: Sum of probabilities for the current cut.
 
         Returns:
-            Current solution as well as cut and stopping criteria variables.
+            Current solution, cut and stopping criteria variables, and the LP solution time.
         """
         G_benders = sparse([G_benders, matrix(np.block([eta, -p, -1]))])
         h_benders = matrix([h_benders, 0])
+        lp_start_time = perf_counter()
         solution = np.array(
             lp(c=self._c, G=G_benders, h=h_benders, A=self._A, b=self._b, solver='glpk')['x'])
+        lp_time = perf_counter() - lp_start_time
+        _record('glpk.lp', lp_time)
         eta, p = self._benders_cut(solution)
         w = eta @ solution[0:-2] - p * solution[-2]
         F_lower = self._c.T @ solution
-        return solution, w, F_lower, G_benders, h_benders, eta, p
+        return solution, w, F_lower, G_benders, h_benders, eta, p, lp_time
+
+    def _benders_initial_cut(self) -> Tuple[np.ndarray, float]:
+        """Method for generating the initial Benders cut using all scenarios.
+
+        Returns:
+            Input for the initial cut.
+        """
+        return _expectation(self._p.T, self._losses), 1
 
+    @_profiled
     def _benders_cut(self, solution: np.ndarray) -> Tuple[np.ndarray, float]:
         """Method for generating Benders cut.
 
@@ -223,7 +347,7 @@ class MeanCVaR(Optimization):
         Returns:
             Input for the next cut.
         """
-        K = (self._losses @ solution[0:self._I] >= solution[-2])[:, 0]
+        K = (self._losses @ solution[0:self._I].astype(self._dtype) >= solution[-2])[:, 0]
         eta = self._p[:, K] @ self._losses[K, :]
         p = np.sum(self._p[0, K])
         return eta, p
@@ -244,15 +368,34 @@ class MeanCVaR(Optimization):
         else:
             return (F_star - F_lower) > self._abstol
 
-    def efficient_portfolio(self, return_target: float = None) -> np.ndarray:
+    def _portfolio_risk(self, e: np.ndarray) -> float:
+        """Method for computing the CVaR of a portfolio with shape (I, 1)."""
+        pf_pnl = -(self._losses @ e.astype(self._dtype)) / self._R_scalar
+        return _cvar_calc(pf_pnl, self._p.T, self._alpha)[0, 0]
+
+    def efficient_portfolio(
+            self, return_target: float = None, return_info: bool = False,
+            cancel_event: threading.Event = None
+            ) -> Union[np.ndarray, Tuple[np.ndarray, dict]]:
         """Method for computing a mean-CVaR efficient portfolio with return a target.
 
         Args:
             return_target: Return target for the efficient portfolio.
                 The minimum CVaR portfolio is computed by default.
+            return_info: Boolean indicating whether to also return a dictionary with the
+                Benders algorithm status ('optimal', 'maxiter', or 'time_limit'), number
+                of iterations, lower bound on the minimum CVaR, CVaR of the returned
+                portfolio as upper bound, optimality gap, computation time, and a
+                per-iteration trace of lower bounds, best Rockafellar-Uryasev objective
+                values, and LP times. Default: False.
+            cancel_event: Event that stops the Benders algorithm before its next iteration
+                when it is set, e.g., from another thread. Default: None.
 
         Returns:
-            Efficient portfolio exposures with shape (I, 1).
+            Efficient portfolio exposures with shape (I, 1) and optionally solution info.
+
+        Raises:
+            CancelledError: If cancel_event is set.
         """
         if return_target is None:
             G = copy(self._G)
@@ -260,15 +403,116 @@ class MeanCVaR(Optimization):
         else:
             G = sparse([self._G, self._expected_return_row])
             h = matrix([self._h, -return_target])
-        return self._benders_algorithm(G, h)[0:-2]
+        solution, info = self._benders_algorithm(G, h, cancel_event)
+        if return_info:
+            return solution[0:-2], info
+        return solution[0:-2]
+
+
+class MeanCML(MeanCVaR):
+    """Class for efficient mean-CML optimization using Benders decomposition.
+
+    The Conditional Maximum Loss (CML) is the CVaR of the maximum cumulative loss
+    along each simulated path, see https://antonvorobets.substack.com/p/conditional-
+    maximum-loss-portfolio-optimization. The Benders cuts are generated from the worst
+    cumulative loss of each path, so the problem size does not grow with the number of
+    horizons.
+
+    Args:
+        R: Tensor with cumulative P&L path simulations and shape (S, I, H).
+        G: Inequality constraints matrix with shape (N, I).
+        h: Inequality constraints vector with shape (N,).
+        A: Equality constraints matrix with shape (M, I).
+        b: Equality constraints vector with shape (M,).
+        v: Vector of relative market values and shape (I,).
+            Default: np.ones(I).
+        p: Vector containing path probabilities with shape (S, 1).
+            Default: np.ones((S, 1)) / S.
+        alpha: Alpha value for alpha-CML. Default: 0.95.
+        kwargs: options dictionary with Benders algorithm parameters.
+
+    Raises:
+        ValueError: If constraints or options parameters are infeasible.
+    """
+    _scenario_dimensions = 3
+
+    def _scenario_losses(self, R: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Method for computing the expected returns and the scaled path losses.
+
+        Args:
+            R: Tensor with cumulative P&L path simulations and shape (S, I, H).
+
+        Returns:
+            Expected horizon returns with shape (1, I) and losses with shape (H, S, I).
+        """
+        path_means = np.tensordot(self._p[0], R, axes=1)
+        R_paths = np.moveaxis(R, 2, 0)
+        losses = np.empty(R_paths.shape, dtype=self._dtype)
+        if self._demean:
+            np.subtract(R_paths, path_means.T[:, np.newaxis, :], out=losses, casting='same_kind')
+        else:
+            losses[:] = R_paths
+        losses *= -self._R_scalar
+        return path_means[np.newaxis, :, -1], losses
+
+    def _max_losses(self, e: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Method for computing the maximum path losses of a portfolio.
+
+        Args:
+            e: Portfolio exposures with shape (I, 1).
+
+        Returns:
+            Maximum losses with shape (S,) and the horizons where they occur.
+        """
+        path_losses = (self._losses @ e.astype(self._dtype))[:, :, 0]
+        worst_horizons = np.argmax(path_losses, axis=0)
+        max_losses = np.maximum(path_losses[worst_horizons, np.arange(self._S)], 0)
+        return max_losses, worst_horizons
+
+    def _benders_initial_cut(self) -> Tuple[np.ndarray, float]:
+        """Method for generating the initial Benders cut using the horizon losses.
+
+        Returns:
+            Input for the initial cut.
+        """
+        return _expectation(self._p.T, self._losses[-1]), 1
+
+    @_profiled
+    def _benders_cut(self, solution: np.ndarray) -> Tuple[np.ndarray, float]:
+        """Method for generating Benders cut from the worst cumulative path losses.
+
+        Args:
+            solution: Current solution.
+
+        Returns:
+            Input for the next cut.
+        """
+        max_losses, worst_horizons = self._max_losses(solution[0:self._I])
+        K = max_losses >= solution[-2, 0]
+        K_loss = np.flatnonzero(K & (max_losses > 0))
+        eta = self._p[:, K_loss] @ self._losses[worst_horizons[K_loss], K_loss, :]
+        p = np.sum(self._p[0, K])
+        return eta, p
+
+    def _portfolio_risk(self, e: np.ndarray) -> float:
+        """Method for computing the CML of a portfolio with shape (I, 1)."""
+        max_losses = self._max_losses(e)[0][:, np.newaxis]
+        return _cvar_calc(-max_losses / self._R_scalar, self._p.T, self._alpha)[0, 0]
 
 
 class MeanVariance(Optimization):
     """Class for efficient mean-variance optimization.
 
+    The covariance matrix can be given as a factor model B Sigma_f B' + diag(D), in
+    which case the problem is lifted with the factor exposures y = B'e and the expected
+    return mean'e as auxiliary variables. This avoids the dense (I, I) covariance matrix
+    and keeps the quadratic program sparse, so the cost scales with the number of factors.
+
     Args:
         mean: Mean vector with shape (I,).
-        covariance_matrix: Covariance matrix with shape (I, I).
+        covariance_matrix: Covariance matrix with shape (I, I) or factor model tuple
+            (B, Sigma_f, D) with factor loadings B with shape (I, K), factor covariance
+            matrix Sigma_f with shape (K, K), and specific variances D with shape (I,).
         G: Inequality constraints matrix with shape (N, I).
         h: Inequality constraints vector with shape (N,).
         A: Equality constraints matrix with shape (M, I).
@@ -280,50 +524,374 @@ class MeanVariance(Optimization):
         ValueError: If constraints are infeasible.
     """
     def __init__(
-            self, mean: np.ndarray, covariance_matrix: np.ndarray,
+            self, mean: np.ndarray,
+            covariance_matrix: Union[np.ndarray, Tuple[np.ndarray, np.ndarray, np.ndarray]],
             G: np.ndarray = None, h: np.ndarray = None, A: np.ndarray = None,
             b: np.ndarray = None, v: np.ndarray = None):
 
         self._I = len(mean)
         self._mean = mean
-        self._expected_return_row = -matrix(mean).T
-        self._P = matrix(1000 * covariance_matrix)
-        self._q = matrix(np.zeros(self._I))
+        if isinstance(covariance_matrix, tuple):
+            factor_loadings, factor_covariance, specific_variances = covariance_matrix
+            K = factor_loadings.shape[1]
+            self._P = spdiag([spdiag(matrix(1000 * specific_variances)),
+                              matrix(1000 * factor_covariance), matrix([[0.]])])
+            auxiliary_rows = np.block([
+                [factor_loadings.T, -np.eye(K), np.zeros((K, 1))],
+                [np.ravel(mean), np.zeros(K), -1]])
+            self._num_auxiliary = K + 1
+            self._expected_return_row = sparse(matrix(np.hstack((np.zeros(self._I + K), -1))).T)
+        else:
+            self._P = matrix(1000 * covariance_matrix)
+            auxiliary_rows = np.zeros((0, self._I))
+            self._num_auxiliary = 0
+            self._expected_return_row = -matrix(mean).T
+        auxiliary_zeros = np.zeros(self._num_auxiliary)
+        self._q = matrix(np.zeros(self._I + self._num_auxiliary))
 
         if v is None:
-            self._v = np.ones((1, self._I))
+            self._v = np.hstack((np.ones(self._I), auxiliary_zeros))[np.newaxis, :]
         else:
-            self._v = v[np.newaxis, :]
+            self._v = np.hstack((v, auxiliary_zeros))[np.newaxis, :]
 
         if G is None:
-            self._G = sparse(matrix(np.zeros((1, self._I))))
+            self._G = sparse(matrix(np.zeros((1, self._I + self._num_auxiliary))))
             self._h = matrix([0.])
         else:
-            self._G = sparse(matrix(G))
+            self._G = sparse(matrix(np.hstack((G, np.zeros((G.shape[0], self._num_auxiliary))))))
             self._h = matrix(h)
 
         if A is None:
-            self._A = sparse(matrix(self._v))
-            self._b = matrix([1.])
+            self._A = sparse(matrix(np.vstack((auxiliary_rows, self._v))))
+            self._b = matrix(np.hstack((auxiliary_zeros, [1.])))
         else:
-            self._A = sparse(matrix(np.vstack((A, self._v))))
-            self._b = matrix(np.hstack((b, [1.])))
+            self._A = sparse(matrix(np.vstack((
+                np.hstack((A, np.zeros((A.shape[0], self._num_auxiliary)))),
+                auxiliary_rows, self._v))))
+            self._b = matrix(np.hstack((b, auxiliary_zeros, [1.])))
 
         _ = self._calculate_max_expected_return(feasibility_check=True)
 
-    def efficient_portfolio(self, return_target: float = None) -> np.ndarray:
+        self._covariance_matrix = covariance_matrix
+        self._endpoints = None
+        self._corner_returns = None
+        self._corner_portfolios = None
+
+    def efficient_portfolio(self, return_target: float = None, method: str = None) -> np.ndarray:
         """Method for computing a mean-variance efficient portfolio with a return target.
 
         Args:
             return_target: Return target for the efficient portfolio.
                 The minimum variance portfolio is computed by default.
+            method: Solution method: {'qp', 'cla'}. Default: 'qp'.
 
         Returns:
             Efficient portfolio exposures with shape (I, 1).
+
+        Raises:
+            ValueError: If method is not supported or the return target is infeasible
+                for the 'cla' method.
         """
-        if return_target is None:
-            return np.array(qp(self._P, self._q, self._G, self._h, self._A, self._b)['x'])
+        if self._check_method(method) == 'cla':
+            if return_target is None:
+                return_target = -np.inf
+            return self._interpolate_corner_portfolios(np.array([return_target]))
+        elif return_target is None:
+            solution = qp(self._P, self._q, self._G, self._h, self._A, self._b)
         else:
             G = sparse([self._G, self._expected_return_row])
             h = matrix([self._h, -return_target])
-            return np.array(qp(self._P, self._q, G, h, self._A, self._b)['x'])
+            solution = qp(self._P, self._q, G, h, self._A, self._b)
+        return np.array(solution['x'])[0:self._I]
+
+    def efficient_frontier(self, num_portfolios: int = None, method: str = None) -> np.ndarray:
+        """Method for computing the efficient frontier.
+
+        Args:
+            num_portfolios: Number of portfolios used to span the efficient frontier. Default: 9.
+            method: Solution method: {'qp', 'cla'}. Default: 'qp'.
+
+        Returns:
+            Efficient frontier with shape (I, num_portfolios).
+
+        Raises:
+            ValueError: If method is not supported or expected return is unbounded.
+        """
+        if self._check_method(method) == 'qp':
+            return super().efficient_frontier(num_portfolios)
+        if num_portfolios is None:
+            num_portfolios = 9
+        corner_returns, _ = self.corner_portfolios()
+        return_targets = np.linspace(corner_returns[0], corner_returns[-1], num_portfolios)
+        return self._interpolate_corner_portfolios(return_targets)
+
+    def corner_portfolios(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Method for computing the corner portfolios of the efficient frontier.
+
+        The corner portfolios are computed once using a critical line algorithm,
+        i.e., a parametric active set method for the quadratic program. Efficient
+        portfolios are linear in the return target between two consecutive corner
+        portfolios, so the 'cla' method interpolates them instead of solving a new
+        quadratic program for each return target.
+
+        Returns:
+            Corner portfolio expected returns with shape (K,) and
+            corner portfolio exposures with shape (I, K).
+
+        Raises:
+            ValueError: If expected return is unbounded or the algorithm does not converge.
+        """
+        if self._corner_portfolios is None:
+            self._corner_returns, self._corner_portfolios = self._critical_line_algorithm()
+        return self._corner_returns, self._corner_portfolios
+
+    def _portfolio_risk(self, e: np.ndarray) -> float:
+        """Method for computing the volatility of a portfolio with shape (I, 1)."""
+        if isinstance(self._covariance_matrix, tuple):
+            return portfolio_vol(e, self._covariance_matrix)
+        return np.sqrt(e[:, 0] @ self._covariance_matrix @ e[:, 0])
+
+    @staticmethod
+    def _check_method(method: str) -> str:
+        if method is None:
+            return 'qp'
+        elif method not in ('qp', 'cla'):
+            raise ValueError(f'Method {method} not supported. Choose qp or cla.')
+        return method
+
+    def _critical_line_algorithm(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Method for tracing the efficient frontier from the minimum variance portfolio
+        to the maximum expected return portfolio.
+
+        The exposures are affine in the risk tolerance lambda of the problem
+        min 0.5 * e'Pe - lambda * mean'e for a fixed active set, so the frontier
+        is traced by moving lambda from zero until a constraint enters or leaves.
+
+        Returns:
+            Corner portfolio expected returns and exposures.
+        """
+        _ = self._calculate_max_expected_return()
+        P = np.array(matrix(self._P))
+        G = np.array(matrix(self._G))
+        h = np.array(self._h)[:, 0]
+        A = np.array(matrix(self._A))
+        b = np.array(self._b)[:, 0]
+        M = len(b)
+        constraint_rows = np.any(G != 0, axis=1)
+
+        solution = qp(self._P, self._q, self._G, self._h, self._A, self._b)
+        active = (np.array(solution['z'])[:, 0] > np.array(solution['s'])[:, 0]) & constraint_rows
+        mean = -np.array(matrix(self._expected_return_row))[0]
+        risk_tolerance = 0.
+        tol = 1e-9
+        corner_returns = []
+        corner_portfolios = []
+
+        for _ in range(10 * (len(mean) + len(h))):
+            active_indices = np.flatnonzero(active)
+            w0, w1, nu0, nu1 = self._critical_line_segment(
+                P, mean, G[active], h[active], A, b)
+            w = w0 + risk_tolerance * w1
+            multipliers = nu0[M:] + risk_tolerance * nu1[M:]
+            slack = h - G @ w
+
+            violations = np.where(~active & constraint_rows, -slack, -np.inf)
+            violations[active_indices] = -multipliers
+            if np.max(violations) > tol:  # Correct the initial active set
+                event = np.argmax(violations)
+                active[event] = not active[event]
+                continue
+
+            expected_return = mean @ w
+            if not corner_returns or expected_return > corner_returns[-1] + tol:
+                corner_returns.append(expected_return)
+                corner_portfolios.append(w[0:self._I])
+
+            G_w1 = G @ w1
+            steps = np.full(len(h), np.inf)
+            entering = ~active & constraint_rows & (G_w1 > tol)
+            steps[entering] = slack[entering] / G_w1[entering]
+            leaving = nu1[M:] < -tol
+            steps[active_indices[leaving]] = -multipliers[leaving] / nu1[M:][leaving]
+            event = np.argmin(steps)
+            if steps[event] == np.inf:
+                return np.array(corner_returns), np.array(corner_portfolios).T
+            risk_tolerance += steps[event]
+            active[event] = not active[event]
+        raise ValueError('Critical line algorithm did not converge.')
+
+    def _critical_line_segment(
+            self, P: np.ndarray, mean: np.ndarray, G_active: np.ndarray, h_active: np.ndarray,
+            A: np.ndarray, b: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Method for solving the KKT system for a given active set.
+
+        Args:
+            P: Quadratic objective matrix with shape (I + K, I + K).
+            mean: Mean vector with shape (I + K,).
+            G_active: Active inequality constraints matrix with shape (N_active, I + K).
+            h_active: Active inequality constraints vector with shape (N_active,).
+            A: Equality constraints matrix with shape (M, I + K).
+            b: Equality constraints vector with shape (M,).
+
+        Returns:
+            Exposures w0 + lambda * w1 and multipliers nu0 + lambda * nu1
+            as affine functions of the risk tolerance lambda.
+        """
+        E = np.vstack((A, G_active))
+        num_variables = len(mean)
+        num_rows = E.shape[0]
+        kkt = np.block([[P, E.T], [E, np.zeros((num_rows, num_rows))]])
+        rhs = np.zeros((num_variables + num_rows, 2))
+        rhs[num_variables:, 0] = np.hstack((b, h_active))
+        rhs[:num_variables, 1] = mean
+        try:
+            kkt_solution = np.linalg.solve(kkt, rhs)
+        except np.linalg.LinAlgError:  # Redundant active constraints
+            kkt_solution = np.linalg.lstsq(kkt, rhs, rcond=None)[0]
+            if np.max(np.abs(kkt @ kkt_solution - rhs)) > 1e-8 * (1 + np.max(np.abs(rhs))):
+                raise ValueError(
+                    'Covariance matrix must be positive definite on the feasible set.')
+        return (kkt_solution[:num_variables, 0], kkt_solution[:num_variables, 1],
+                kkt_solution[num_variables:, 0], kkt_solution[num_variables:, 1])
+
+    def _interpolate_corner_portfolios(self, return_targets: np.ndarray) -> np.ndarray:
+        """Method for computing efficient portfolios by interpolating corner portfolios.
+
+        Args:
+            return_targets: Return targets with shape (num_portfolios,). Return targets
+                below the minimum variance return give the minimum variance portfolio.
+
+        Returns:
+            Efficient portfolio exposures with shape (I, num_portfolios).
+
+        Raises:
+            ValueError: If a return target exceeds the maximum expected return.
+        """
+        corner_returns, corner_portfolios = self.corner_portfolios()
+        if np.any(return_targets > corner_returns[-1] + 1e-12 * (1 + np.abs(corner_returns[-1]))):
+            raise ValueError('Return target exceeds the maximum expected return.')
+        return_targets = np.clip(return_targets, corner_returns[0], corner_returns[-1])
+        if len(corner_returns) == 1:
+            return np.repeat(corner_portfolios, len(return_targets), axis=1)
+        upper = np.clip(
+            np.searchsorted(corner_returns, return_targets), 1, len(corner_returns) - 1)
+        lower = upper - 1
+        weights = ((return_targets - corner_returns[lower])
+                   / (corner_returns[upper] - corner_returns[lower]))
+        return corner_portfolios[:, lower] + weights * (
+            corner_portfolios[:, upper] - corner_portfolios[:, lower])
+
+
+class EfficientFrontier:
+    """Class for adaptive efficient frontier computations with memoized portfolios.
+
+    The frontier is sampled adaptively where it bends the most. Since the risk is a
+    convex function of the return target, the chords of the neighboring intervals give
+    a lower bound for the risk, so the approximation error of each interval can be
+    bounded without solving additional problems. Solved portfolios are memoized and
+    reused for refinements and return target queries.
+
+    Args:
+        optimization: MeanCVaR, MeanCML, or MeanVariance instance.
+    """
+    def __init__(self, optimization: Union[MeanCVaR, MeanCML, MeanVariance]):
+        self._optimization = optimization
+        min_risk_portfolio, self._max_expected_return = optimization._frontier_endpoints()
+        self._min_expected_return = float(np.ravel(optimization._mean) @ min_risk_portfolio[:, 0])
+        self._portfolios = {}
+        self._risks = {}
+        self._add_portfolio(self._min_expected_return, min_risk_portfolio)
+
+    def _add_portfolio(self, return_target: float, portfolio: np.ndarray):
+        self._portfolios[return_target] = portfolio
+        self._risks[return_target] = self._optimization._portfolio_risk(portfolio)
+
+    def efficient_portfolio(self, return_target: float = None) -> np.ndarray:
+        """Method for computing a memoized efficient portfolio with a return target.
+
+        Args:
+            return_target: Return target for the efficient portfolio.
+                The minimum risk portfolio is returned by default.
+
+        Returns:
+            Efficient portfolio exposures with shape (I, 1).
+
+        Raises:
+            ValueError: If the return target exceeds the highest expected return.
+        """
+        if return_target is None or return_target <= self._min_expected_return:
+            return_target = self._min_expected_return
+        elif return_target > self._max_expected_return:
+            raise ValueError('Return target exceeds the maximum expected return.')
+        return_target = float(return_target)
+        if return_target not in self._portfolios:
+            self._add_portfolio(
+                return_target, self._optimization.efficient_portfolio(return_target))
+        return self._portfolios[return_target]
+
+    def refine(
+            self, tol: float = None, max_portfolios: int = None
+            ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Method for adaptively refining the efficient frontier.
+
+        Args:
+            tol: Tolerance for the largest approximation error bound of the piecewise linear
+                risk / return curve relative to the risk range. Default: 1e-3.
+            max_portfolios: Maximum number of portfolios on the frontier. Default: 25.
+
+        Returns:
+            Expected returns with shape (K,), risks with shape (K,), and efficient
+            portfolio exposures with shape (I, K).
+        """
+        if tol is None:
+            tol = 1e-3
+        if max_portfolios is None:
+            max_portfolios = 25
+        _ = self.efficient_portfolio(self._max_expected_return)
+
+        while len(self._portfolios) < max_portfolios:
+            return_targets, risks = self._frontier_points()
+            error_bounds = self._error_bounds(return_targets, risks)
+            interval = np.argmax(error_bounds)
+            if error_bounds[interval] <= tol * (risks[-1] - risks[0]):
+                break
+            _ = self.efficient_portfolio(
+                (return_targets[interval] + return_targets[interval + 1]) / 2)
+
+        return_targets, risks = self._frontier_points()
+        portfolios = np.hstack([self._portfolios[target] for target in return_targets])
+        return return_targets, risks, portfolios
+
+    def _frontier_points(self) -> Tuple[np.ndarray, np.ndarray]:
+        return_targets = np.array(sorted(self._portfolios))
+        risks = np.array([self._risks[target] for target in return_targets])
+        return return_targets, risks
+
+    @staticmethod
+    def _error_bounds(return_targets: np.ndarray, risks: np.ndarray) -> np.ndarray:
+        """Method for bounding the piecewise linear approximation error for each interval.
+
+        Args:
+            return_targets: Sorted expected returns with shape (K,).
+            risks: Risks with shape (K,).
+
+        Returns:
+            Approximation error bounds with shape (K - 1,).
+        """
+        slopes = np.diff(risks) / np.diff(return_targets)
+        # The minimum risk is a lower bound with zero slope for the first interval
+        slopes_left = np.hstack(([0.], slopes[:-1]))
+        slopes_right = np.hstack((slopes[1:], [np.nan]))
+        t0, t1 = return_targets[:-1], return_targets[1:]
+        f0, f1 = risks[:-1], risks[1:]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            intersections = np.where(
+                slopes_right > slopes_left,
+                (f1 - f0 + slopes_left * t0 - slopes_right * t1) / (slopes_left - slopes_right),
+                t1)
+        intersections = np.clip(intersections, t0, t1)
+        chords = f0 + slopes * (intersections - t0)
+        lower_bounds = np.fmax(f0 + slopes_left * (intersections - t0),
+                               f1 + slopes_right * (intersections - t1))
+        return np.maximum(chords - lower_bounds, 0)
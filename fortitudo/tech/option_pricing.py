@@ -15,9 +15,13 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 import numpy as np
-from scipy.stats import norm
+from scipy.special import ndtr
 from typing import Tuple
 
+_GREEKS = (
+    'call', 'put', 'call_delta', 'put_delta', 'gamma', 'vega',
+    'call_theta', 'put_theta', 'call_rho', 'put_rho')
+
 
 def forward(S: float, r: float, q: float, T: float) -> float:
     """Function for computing the continuously compounded forward price.
@@ -46,8 +50,9 @@ def _d1_d2(F: float, K: float, sigma: float, T: float) -> Tuple[float, float]:
     Returns:
         d1 and d2.
     """
-    d1 = (np.log(F / K) + sigma**2 * T / 2) / (sigma * np.sqrt(T))
-    d2 = d1 - sigma * np.sqrt(T)
+    vol_sqrt_T = sigma * np.sqrt(T)
+    d1 = (np.log(F / K) + sigma**2 * T / 2) / vol_sqrt_T
+    d2 = d1 - vol_sqrt_T
     return d1, d2
 
 
@@ -65,7 +70,7 @@ def call_option(F: float, K: float, sigma: float, r: float, T: float) -> float:
         European call option price.
     """
     d1, d2 = _d1_d2(F, K, sigma, T)
-    call_price = np.exp(-r * T) * (F * norm.cdf(d1) - K * norm.cdf(d2))
+    call_price = np.exp(-r * T) * (F * ndtr(d1) - K * ndtr(d2))
     return call_price
 
 
@@ -83,5 +88,174 @@ def put_option(F: float, K: float, sigma: float, r: float, T: float) -> float:
         European put option price.
     """
     d1, d2 = _d1_d2(F, K, sigma, T)
-    put_price = np.exp(-r * T) * (K * norm.cdf(-d2) - F * norm.cdf(-d1))
+    put_price = np.exp(-r * T) * (K * ndtr(-d2) - F * ndtr(-d1))
     return put_price
+
+
+def option_prices(
+        F: np.ndarray, K: np.ndarray, sigma: np.ndarray, r: np.ndarray, T: np.ndarray,
+        out: Tuple[np.ndarray, np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Function for computing European call and put option prices using Black's formula.
+
+    The inputs are broadcast against each other, e.g., forward prices with shape (S, 1, 1),
+    strikes with shape (1, N_K, 1), implied volatilities with shape (S, N_K, N_T), and
+    interest rates and maturities with shape (1, 1, N_T) give prices for all scenarios,
+    strikes, and maturities.
+
+    Args:
+        F: Forward prices.
+        K: Strike values.
+        sigma: Implied volatilities.
+        r: Interest rates.
+        T: Times to maturity.
+        out: Optional tuple with arrays that the call and put prices are written to.
+
+    Returns:
+        European call and put option prices.
+    """
+    d1, d2 = _d1_d2(F, K, sigma, T)
+    discount_factor = np.exp(-r * T)
+    if out is None:
+        shape = np.broadcast_shapes(*map(np.shape, (F, K, sigma, r, T)))
+        out = (np.empty(shape), np.empty(shape))
+    call_prices, put_prices = out
+
+    np.multiply(F, ndtr(d1), out=call_prices)
+    call_prices -= K * ndtr(d2)
+    call_prices *= discount_factor
+    np.multiply(K, ndtr(-d2), out=put_prices)
+    put_prices -= F * ndtr(-d1)
+    put_prices *= discount_factor
+    return call_prices, put_prices
+
+
+def option_greeks(
+        F: np.ndarray, K: np.ndarray, sigma: np.ndarray, r: np.ndarray, T: np.ndarray,
+        greeks: list = None) -> dict:
+    """Function for computing European option prices and greeks using Black's formula.
+
+    The inputs are broadcast against each other like for the option_prices function.
+    Deltas and gamma are sensitivities to the forward price, theta is the sensitivity to
+    the passage of time for a fixed forward price, i.e., -dV/dT, and rho is the
+    sensitivity to the interest rate for a fixed forward price.
+
+    Args:
+        F: Forward prices.
+        K: Strike values.
+        sigma: Implied volatilities.
+        r: Interest rates.
+        T: Times to maturity.
+        greeks: List with requested outputs from {'call', 'put', 'call_delta', 'put_delta',
+            'gamma', 'vega', 'call_theta', 'put_theta', 'call_rho', 'put_rho'}.
+            Default: all outputs.
+
+    Returns:
+        Dictionary with the requested prices and greeks.
+
+    Raises:
+        ValueError: If an unknown output is requested.
+    """
+    if greeks is None:
+        greeks = _GREEKS
+    for greek in greeks:
+        if greek not in _GREEKS:
+            raise ValueError(f'Greek {greek} not supported. Choose from {_GREEKS}.')
+
+    requested = set(greeks)
+    sqrt_T = np.sqrt(T)
+    d1, d2 = _d1_d2(F, K, sigma, T)
+    discount_factor = np.exp(-r * T)
+    results = {}
+    if {'call', 'call_theta', 'call_rho'} & requested:
+        results['call'] = discount_factor * (F * ndtr(d1) - K * ndtr(d2))
+    if {'put', 'put_theta', 'put_rho'} & requested:
+        results['put'] = discount_factor * (K * ndtr(-d2) - F * ndtr(-d1))
+    if 'call_delta' in requested:
+        results['call_delta'] = discount_factor * ndtr(d1)
+    if 'put_delta' in requested:
+        results['put_delta'] = -discount_factor * ndtr(-d1)
+
+    if {'gamma', 'vega', 'call_theta', 'put_theta'} & requested:
+        density = discount_factor * np.exp(-d1**2 / 2) / np.sqrt(2 * np.pi)
+        results['gamma'] = density / (F * sigma * sqrt_T)
+        results['vega'] = density * F * sqrt_T
+        time_decay = -density * F * sigma / (2 * sqrt_T)
+        for option in ('call', 'put'):
+            if f'{option}_theta' in requested:
+                results[f'{option}_theta'] = time_decay + r * results[option]
+    for option in ('call', 'put'):
+        if f'{option}_rho' in requested:
+            results[f'{option}_rho'] = -T * results[option]
+    return {greek: results[greek] for greek in greeks}
+
+
+def implied_volatility(
+        price: np.ndarray, F: np.ndarray, K: np.ndarray, r: np.ndarray, T: np.ndarray,
+        call: np.ndarray = None, tol: float = None, max_iter: int = None) -> np.ndarray:
+    """Function for computing implied volatilities of European options using Black's formula.
+
+    The inputs are broadcast against each other like for the option_prices function. Call
+    and put prices are converted to out-of-the-money prices through put-call parity, and
+    the initial guess of Corrado and Miller is refined with Newton steps on the logarithm
+    of the out-of-the-money price, safeguarded by bisection, for all options at once.
+
+    Args:
+        price: Option prices.
+        F: Forward prices.
+        K: Strike values.
+        r: Interest rates.
+        T: Times to maturity.
+        call: Boolean array indicating call options. Default: True.
+        tol: Relative tolerance for the implied volatilities. Default: 1e-12.
+        max_iter: Maximum number of iterations. Default: 100.
+
+    Returns:
+        Implied volatilities with NaN for prices outside the no-arbitrage bounds.
+    """
+    if call is None:
+        call = True
+    if tol is None:
+        tol = 1e-12
+    if max_iter is None:
+        max_iter = 100
+    price, F, K, r, T, call = np.broadcast_arrays(*map(np.asarray, (price, F, K, r, T, call)))
+    with np.errstate(all='ignore'):
+        undiscounted = price * np.exp(r * T)
+        intrinsic = np.maximum(F - K, 0)
+        time_value = undiscounted - np.where(call, intrinsic, intrinsic - F + K)
+        valid = (time_value > 0) & (time_value < np.minimum(F, K)) & (T > 0)
+        x = np.log(F / K)
+        a = time_value + intrinsic - (F - K) / 2
+        s = np.sqrt(2 * np.pi) / (F + K) * (
+            a + np.sqrt(np.maximum(a**2 - (F - K)**2 / np.pi, 0)))
+    s = np.where(valid & (s > 0), s, 0.5)
+    lower = np.zeros(s.shape)
+    upper = np.full(s.shape, np.inf)
+
+    active = np.flatnonzero(valid)
+    for _ in range(max_iter):
+        if active.size == 0:
+            break
+        s_a, x_a, F_a, K_a = s.flat[active], x.flat[active], F.flat[active], K.flat[active]
+        tv_a = time_value.flat[active]
+        d1 = x_a / s_a + s_a / 2
+        d2 = d1 - s_a
+        otm = np.where(K_a >= F_a, F_a * ndtr(d1) - K_a * ndtr(d2),
+                       K_a * ndtr(-d2) - F_a * ndtr(-d1))
+        vega = F_a * np.exp(-d1**2 / 2) / np.sqrt(2 * np.pi)
+        above = otm > tv_a
+        upper.flat[active] = np.where(above, np.minimum(upper.flat[active], s_a),
+                                      upper.flat[active])
+        lower.flat[active] = np.where(above, lower.flat[active],
+                                      np.maximum(lower.flat[active], s_a))
+        with np.errstate(all='ignore'):
+            s_new = s_a - (np.log(otm) - np.log(tv_a)) * otm / vega
+        lower_a, upper_a = lower.flat[active], upper.flat[active]
+        bracketed = (s_new >= lower_a) & (s_new <= upper_a)
+        fallback = np.where(np.isfinite(upper_a), (lower_a + upper_a) / 2, 2 * s_a)
+        s_new = np.where(bracketed, s_new, fallback)
+        s.flat[active] = s_new
+        converged = (np.abs(s_new - s_a) <= tol * s_new) | (otm == tv_a)
+        active = active[~converged]
+
+    return np.where(valid, s / np.sqrt(np.where(T > 0, T, 1)), np.nan)
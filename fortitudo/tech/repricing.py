@@ -0,0 +1,201 @@
+# fortitudo.tech - Novel Investment Technologies.
+# Copyright (C) 2021-2025 Fortitudo Technologies.
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from typing import Tuple
+from .option_pricing import forward, option_prices
+
+_REPRICING_CHUNK_SIZE = 10000
+_OPTION_TYPES = ('call', 'put')
+
+
+def _interpolation_weights(grid: np.ndarray, points: np.ndarray) -> np.ndarray:
+    """Function for computing linear interpolation weights with flat extrapolation.
+
+    Args:
+        grid: Increasing grid points with shape (N,).
+        points: Interpolation points with shape (M,).
+
+    Returns:
+        Weights with shape (N, M) such that values @ weights interpolates values.
+    """
+    return np.array([np.interp(points, grid, unit) for unit in np.eye(len(grid))])
+
+
+def _surface_volatilities(
+        surfaces: np.ndarray, maturity_weights: np.ndarray, moneyness_grid: np.ndarray,
+        moneyness: np.ndarray) -> np.ndarray:
+    """Function for interpolating implied volatility surfaces bilinearly.
+
+    Args:
+        surfaces: Implied volatility surfaces with shape (S, N_T, N_K).
+        maturity_weights: Maturity interpolation weights with shape (N_T, M).
+        moneyness_grid: Increasing moneyness grid with shape (N_K,).
+        moneyness: Moneyness of the options with shape (S, M).
+
+    Returns:
+        Implied volatilities with shape (S, M).
+    """
+    smiles = np.einsum('stk,tm->smk', surfaces, maturity_weights)
+    if len(moneyness_grid) == 1:
+        return smiles[:, :, 0]
+    upper = np.clip(np.searchsorted(moneyness_grid, moneyness), 1, len(moneyness_grid) - 1)
+    lower_moneyness = moneyness_grid[upper - 1]
+    weights = np.clip(
+        (moneyness - lower_moneyness) / (moneyness_grid[upper] - lower_moneyness), 0, 1)
+    lower_vols = np.take_along_axis(smiles, upper[:, :, np.newaxis] - 1, axis=2)[:, :, 0]
+    upper_vols = np.take_along_axis(smiles, upper[:, :, np.newaxis], axis=2)[:, :, 0]
+    return lower_vols + weights * (upper_vols - lower_vols)
+
+
+def _option_values(
+        factors: pd.DataFrame, instruments: pd.DataFrame, vol_surfaces: dict,
+        rate_curve: pd.Series, time_to_maturity: np.ndarray, percent: bool) -> np.ndarray:
+    """Function for computing option values for a block of risk factor scenarios.
+
+    Args:
+        factors: Risk factor scenarios with shape (S, factors).
+        instruments: Instrument definitions with shape (I, 4) or (I, 5).
+        vol_surfaces: Dictionary with implied volatility surface column names.
+        rate_curve: Interest rate curve column names indexed by maturities.
+        time_to_maturity: Remaining times to maturity with shape (I,).
+        percent: Whether the interest rates and implied volatilities are in percent.
+
+    Returns:
+        Option values with shape (S, I).
+    """
+    values = np.empty((len(factors), len(instruments)))
+    live = time_to_maturity > 0
+    maturities = np.where(live, time_to_maturity, 1.)
+    rates = factors[rate_curve.values].values @ _interpolation_weights(
+        rate_curve.index.values.astype(float), maturities)
+    if percent:
+        rates /= 100
+    is_call = (instruments['type'] == 'call').values
+    strikes = instruments['strike'].values.astype(float)
+    if 'dividend_yield' in instruments:
+        dividend_yields = instruments['dividend_yield'].values.astype(float)
+    else:
+        dividend_yields = np.zeros(len(instruments))
+
+    for underlying, positions in instruments.groupby('underlying', sort=False).indices.items():
+        surface_columns = vol_surfaces[underlying]
+        spot = factors[underlying].values[:, np.newaxis]
+        maturity_weights = _interpolation_weights(
+            surface_columns.index.values.astype(float), maturities[positions])
+        surfaces = factors[surface_columns.values.ravel()].values.reshape(
+            (len(factors), ) + surface_columns.shape)
+        sigma = _surface_volatilities(
+            surfaces, maturity_weights, surface_columns.columns.values.astype(float),
+            strikes[positions] / spot)
+        if percent:
+            sigma /= 100
+
+        T = maturities[positions]
+        r = rates[:, positions]
+        F = forward(spot, r, dividend_yields[positions], T)
+        calls, puts = option_prices(F, strikes[positions], sigma, r, T)
+        intrinsic = np.maximum(spot - strikes[positions], 0)
+        intrinsic_puts = intrinsic - spot + strikes[positions]
+        values[:, positions] = np.where(
+            live[positions], np.where(is_call[positions], calls, puts),
+            np.where(is_call[positions], intrinsic, intrinsic_puts))
+    return values
+
+
+def option_pnl(
+        instruments: pd.DataFrame, scenarios: pd.DataFrame, current: pd.Series,
+        vol_surfaces: dict, rate_curve: pd.Series, horizon: float = None,
+        chunk_size: int = None, workers: int = None, percent: bool = None
+        ) -> Tuple[pd.DataFrame, pd.Series]:
+    """Function for repricing European options in risk factor scenarios.
+
+    The options are priced using Black's model with forward prices computed from the
+    underlying prices, interest rates, and dividend yields, implied volatilities
+    interpolated bilinearly in time to maturity and moneyness, i.e., strike divided by
+    underlying price, and interest rates interpolated linearly in time to maturity. Both
+    interpolations use flat extrapolation. Options that expire before the horizon are
+    valued at their intrinsic value.
+
+    Interest rates and implied volatilities are continuously compounded annual rates
+    and annualized volatilities given as decimals, e.g., 0.03 for 3%, unless percent is
+    True. The load_time_series data is in percent and can be used with percent=True.
+
+    Args:
+        instruments: DataFrame with the columns 'type' ('call' or 'put'), 'strike',
+            'maturity', 'underlying' (risk factor name of the underlying price), and
+            optionally 'dividend_yield' (continuous dividend yield or carry as a decimal,
+            default 0).
+        scenarios: Risk factor scenarios with shape (S, factors).
+        current: Current risk factor values.
+        vol_surfaces: Dictionary mapping underlying names to DataFrames with the
+            implied volatility column names, maturities as index, and moneyness as columns.
+        rate_curve: Interest rate column names indexed by maturities.
+        horizon: Time from today to the scenarios. Default: 0.
+        chunk_size: Number of scenarios priced at a time. Default: 10000.
+        workers: Number of threads used to price the chunks. Default: 1.
+        percent: Whether the interest rates and implied volatilities are given in
+            percent. Default: False.
+
+    Returns:
+        Option P&L with shape (S, I) and current option prices with shape (I,).
+
+    Raises:
+        ValueError: If instruments contain an unknown option type or underlying, or if
+            chunk_size or workers is not a positive integer, or percent is not boolean.
+    """
+    if horizon is None:
+        horizon = 0.
+    if chunk_size is None:
+        chunk_size = _REPRICING_CHUNK_SIZE
+    elif type(chunk_size) is not int or chunk_size < 1:
+        raise ValueError('chunk_size must be a positive integer.')
+    if workers is None:
+        workers = 1
+    elif type(workers) is not int or workers < 1:
+        raise ValueError('workers must be a positive integer.')
+    if percent is None:
+        percent = False
+    elif type(percent) is not bool:
+        raise ValueError('percent must be either True or False.')
+    if not instruments['type'].isin(_OPTION_TYPES).all():
+        raise ValueError(f'Option types must be in {_OPTION_TYPES}.')
+    if not instruments['underlying'].isin(list(vol_surfaces)).all():
+        raise ValueError('All underlyings must have an implied volatility surface.')
+
+    maturities = instruments['maturity'].values.astype(float)
+    current_prices = _option_values(
+        current.to_frame().T, instruments, vol_surfaces, rate_curve, maturities, percent)[0]
+    S = len(scenarios)
+    pnl = np.empty((S, len(instruments)))
+
+    def reprice_chunk(start: int):
+        end = min(start + chunk_size, S)
+        pnl[start:end] = _option_values(
+            scenarios.iloc[start:end], instruments, vol_surfaces, rate_curve,
+            maturities - horizon, percent)
+        pnl[start:end] -= current_prices
+
+    starts = range(0, S, chunk_size)
+    if workers == 1:
+        list(map(reprice_chunk, starts))
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(reprice_chunk, starts))
+    return (pd.DataFrame(pnl, index=scenarios.index, columns=instruments.index),
+            pd.Series(current_prices, index=instruments.index))
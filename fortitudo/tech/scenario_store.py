@@ -0,0 +1,198 @@
+# fortitudo.tech - Novel Investment Technologies.
+# Copyright (C) 2021-2025 Fortitudo Technologies.
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import json
+import os
+import re
+import numpy as np
+import pandas as pd
+from numpy.lib.format import open_memmap
+from typing import Union
+
+_STORE_CHUNK_SIZE = 10000
+_STORE_FILE = 'store.json'
+_SCENARIOS_FILE = 'scenarios.npy'
+
+
+def _write_description(path: str, names: list, probabilities: list, metadata: dict):
+    """Function for atomically writing the store description."""
+    tmp_path = os.path.join(path, f'{_STORE_FILE}.{os.getpid()}.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump({'names': names, 'probabilities': probabilities, 'metadata': metadata}, f)
+    os.replace(tmp_path, os.path.join(path, _STORE_FILE))
+
+
+class ScenarioStore:
+    """Class for storing a scenario matrix, named probability vectors, and metadata in a
+    directory on disk.
+
+    The scenarios and probability vectors are stored as .npy files and read as numpy
+    arrays backed by memory maps of the files, so they can be passed directly to, e.g.,
+    simulation_moments, portfolio_cvar, entropy_pooling, and MeanCVaR without loading them
+    into memory first.
+
+    Args:
+        path: Directory of an existing store.
+        mode: 'r' for read-only scenarios or 'r+' for writable scenarios. Default: 'r'.
+
+    Raises:
+        ValueError: If mode is not 'r' or 'r+'.
+    """
+
+    def __init__(self, path: str, mode: str = None):
+        if mode is None:
+            mode = 'r'
+        elif mode not in ('r', 'r+'):
+            raise ValueError("mode must be either 'r' or 'r+'.")
+
+        self._path = path
+        with open(os.path.join(path, _STORE_FILE)) as f:
+            description = json.load(f)
+        self._names = description['names']
+        self._probability_names = description['probabilities']
+        self._metadata = description['metadata']
+        self._memmap = np.load(os.path.join(path, _SCENARIOS_FILE), mmap_mode=mode)
+        self._scenarios = self._memmap.view(np.ndarray)
+
+    @classmethod
+    def create(
+            cls, path: str, num_scenarios: int, names: list,
+            metadata: dict = None) -> 'ScenarioStore':
+        """Method for creating an empty store with writable scenarios.
+
+        The scenarios can be written in chunks through the scenarios attribute, e.g.,
+        store.scenarios[start:end] = block, so the full matrix never has to be in memory.
+        Call the flush method when all chunks have been written.
+
+        Args:
+            path: Directory for the store. Created if it does not exist.
+            num_scenarios: Number of scenarios S.
+            names: List with the I instrument or risk factor names.
+            metadata: JSON serializable dictionary with metadata. Default: empty.
+
+        Returns:
+            ScenarioStore with writable scenarios of shape (S, I).
+        """
+        if metadata is None:
+            metadata = {}
+        os.makedirs(path, exist_ok=True)
+        open_memmap(os.path.join(path, _SCENARIOS_FILE), mode='w+',
+                    shape=(num_scenarios, len(names)))
+        _write_description(path, list(names), [], metadata)
+        return cls(path, 'r+')
+
+    @classmethod
+    def from_scenarios(
+            cls, path: str, R: Union[pd.DataFrame, np.ndarray], probabilities: dict = None,
+            metadata: dict = None) -> 'ScenarioStore':
+        """Method for creating a store from a scenario matrix.
+
+        Args:
+            path: Directory for the store. Created if it does not exist.
+            R: Matrix with scenarios and shape (S, I).
+            probabilities: Dictionary with named probability vectors of shape (S, 1).
+                Default: no probability vectors.
+            metadata: JSON serializable dictionary with metadata. Default: empty.
+
+        Returns:
+            Read-only ScenarioStore.
+        """
+        if isinstance(R, pd.DataFrame):
+            names = [str(name) for name in R.columns]
+            R = R.values
+        else:
+            names = [str(i) for i in range(R.shape[1])]
+
+        store = cls.create(path, R.shape[0], names, metadata)
+        for start in range(0, R.shape[0], _STORE_CHUNK_SIZE):
+            store.scenarios[start:start + _STORE_CHUNK_SIZE] = R[start:start + _STORE_CHUNK_SIZE]
+        store.flush()
+        if probabilities is not None:
+            for name, p in probabilities.items():
+                store.add_probabilities(name, p)
+        return cls(path)
+
+    @property
+    def scenarios(self) -> np.ndarray:
+        """Memory-mapped scenario matrix with shape (S, I)."""
+        return self._scenarios
+
+    @property
+    def names(self) -> list:
+        """Instrument or risk factor names."""
+        return self._names
+
+    @property
+    def metadata(self) -> dict:
+        """Dictionary with metadata."""
+        return self._metadata
+
+    @property
+    def probability_names(self) -> list:
+        """Names of the stored probability vectors."""
+        return self._probability_names
+
+    def flush(self):
+        """Method for writing changes to the scenarios to disk."""
+        self._memmap.flush()
+
+    def probabilities(self, name: str) -> np.ndarray:
+        """Method for reading a probability vector.
+
+        Args:
+            name: Name of the probability vector.
+
+        Returns:
+            Memory-mapped probability vector with shape (S, 1).
+
+        Raises:
+            ValueError: If the store does not contain the probability vector.
+        """
+        if name not in self._probability_names:
+            raise ValueError(
+                f'Probability vector {name} not in store. Choose from {self._probability_names}.')
+        file_path = os.path.join(self._path, f'probabilities_{name}.npy')
+        return np.load(file_path, mmap_mode='r').view(np.ndarray)
+
+    def add_probabilities(self, name: str, p: np.ndarray):
+        """Method for adding or replacing a named probability vector.
+
+        Probability vectors can be added to stores with read-only scenarios, e.g., to store
+        Entropy Pooling posteriors next to the prior.
+
+        Args:
+            name: Name consisting of letters, digits, underscores, and hyphens.
+            p: Probability vector with shape (S, 1) or (S,).
+
+        Raises:
+            ValueError: If the name is invalid or p does not have S elements.
+        """
+        if re.fullmatch(r'[\w-]+', name) is None:
+            raise ValueError(
+                'Probability names must consist of letters, digits, underscores, and hyphens.')
+        p = np.asarray(p, dtype=float)
+        if p.size != self._scenarios.shape[0]:
+            raise ValueError('p must have the same length as the scenarios.')
+
+        file_path = os.path.join(self._path, f'probabilities_{name}.npy')
+        tmp_path = f'{file_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.save(f, p.reshape(-1, 1))
+        os.replace(tmp_path, file_path)
+        if name not in self._probability_names:
+            self._probability_names.append(name)
+            _write_description(
+                self._path, self._names, self._probability_names, self._metadata)
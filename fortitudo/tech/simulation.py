@@ -14,26 +14,39 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import hashlib
+import os
+import zlib
 import numpy as np
 import pandas as pd
-from typing import Union, Tuple
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from numpy.lib.format import open_memmap
+from scipy.optimize import Bounds
+from typing import Union, Tuple, Iterator
 from .functions import covariance_matrix
-from .entropy_pooling import entropy_pooling
+from .entropy_pooling import _entropy_pooling
+from .profiling import _in_context, _profiled
 
+_SIM_BLOCK_SIZE = 10000
+_GRID_CHUNK_SIZE = 2**20
 
-def exp_decay_probs(R: Union[pd.DataFrame, np.ndarray], half_life: int) -> np.ndarray:
+
+def exp_decay_probs(
+        R: Union[pd.DataFrame, np.ndarray], half_life: Union[int, np.ndarray]) -> np.ndarray:
     """Function for computing exponential decay probabilities.
 
     Args:
         R: P&L / risk factor simulation with shape (T, I).
-        half_life: Exponential decay half life.
+        half_life: Exponential decay half life or vector of K half lives.
 
     Returns:
-        Exponentially decaying probabilities vector with shape (T, 1).
+        Exponentially decaying probabilities with shape (T, 1) or (T, K).
     """
     T = R.shape[0]
-    p = np.exp(-np.log(2) / half_life * (T - np.arange(1, T + 1)))
-    return (p / np.sum(p))[:, np.newaxis]
+    half_lives = np.atleast_1d(half_life)[:, np.newaxis]
+    p = np.exp(-np.log(2) / half_lives * (T - np.arange(1, T + 1)))
+    return (p / np.sum(p, axis=1, keepdims=True)).T
 
 
 def normal_exp_decay_calib(
@@ -60,8 +73,116 @@ def normal_exp_decay_calib(
     return mean, cov_matrix
 
 
+def normal_exp_decay_calib_grid(
+        R: Union[pd.DataFrame, np.ndarray], half_lives: np.ndarray
+        ) -> Union[Tuple[np.ndarray, np.ndarray], Tuple[pd.DataFrame, np.ndarray]]:
+    """Function for computing exponential decay means and covariances for several half lives.
+
+    The data is centered once around its equally weighted mean, and the second moments
+    for all half lives are computed with a single matrix product of the centered data
+    and the centered data weighted by the probabilities of each half life. If the
+    weighted data would exceed 2^20 elements, the product is split into groups of half
+    lives. The covariance matrices are identical to the ones from normal_exp_decay_calib
+    up to floating point precision.
+
+    Args:
+        R: P&L / risk factor simulation with shape (T, I).
+        half_lives: Vector of K exponential decay half lives.
+
+    Returns:
+        Mean vectors with shape (I, K) and covariance matrices with shape (K, I, I).
+    """
+    half_lives = np.atleast_1d(half_lives)
+    P = exp_decay_probs(R, half_lives)
+    if type(R) is pd.DataFrame:
+        simulation_names = R.columns
+        R = R.values
+    else:
+        simulation_names = None
+
+    T, I = R.shape
+    K = len(half_lives)
+    reference = np.mean(R, axis=0)
+    R_centered = R - reference
+    centered_means = R_centered.T @ P
+    second_moments = np.empty((I, K, I))
+    group_size = max(_GRID_CHUNK_SIZE // (T * I), 1)
+    for start in range(0, K, group_size):
+        end = min(start + group_size, K)
+        weighted = P[:, start:end, np.newaxis] * R_centered[:, np.newaxis, :]
+        second_moments[:, start:end] = np.reshape(
+            R_centered.T @ np.reshape(weighted, (T, -1)), (I, end - start, I))
+
+    cov_matrices = np.swapaxes(second_moments, 0, 1) - (
+        centered_means.T[:, :, np.newaxis] * centered_means.T[:, np.newaxis, :])
+    cov_matrices /= (1 - np.sum(P**2, axis=0))[:, np.newaxis, np.newaxis]
+
+    means = centered_means + reference[:, np.newaxis]
+    if simulation_names is not None:
+        means = pd.DataFrame(means, index=simulation_names, columns=half_lives)
+    return means, cov_matrices
+
+
+class ExpDecayEstimator:
+    """Class for online exponential decay mean and covariance matrix estimation.
+
+    The estimator is seeded with the historical calibration and updated recursively
+    in O(I^2) operations per new observation. The mean and covariance matrix are the
+    same as normal_exp_decay_calib for the full history up to floating point precision.
+
+    Args:
+        R: Historical P&L / risk factor simulation with shape (T, I).
+        half_life: Exponential decay half life.
+    """
+    def __init__(self, R: Union[pd.DataFrame, np.ndarray], half_life: int):
+        if type(R) is pd.DataFrame:
+            self._simulation_names = R.columns
+            R = R.values
+        else:
+            self._simulation_names = None
+
+        self._decay = np.exp(-np.log(2) / half_life)
+        p = exp_decay_probs(R, half_life)
+        decay_powers = self._decay**np.arange(R.shape[0])
+        self._weight_sum = np.sum(decay_powers)
+        self._squared_weight_sum = np.sum(decay_powers**2)
+        self._mean = (R.T @ p)[:, 0]
+        R_centered = R - self._mean
+        self._scatter = (R_centered * p).T @ R_centered
+
+    def update(self, x: np.ndarray):
+        """Method for updating the estimates with new observations.
+
+        Args:
+            x: New observation with shape (I,) or new observations with shape (N, I).
+        """
+        for observation in np.atleast_2d(x):
+            self._weight_sum = self._decay * self._weight_sum + 1
+            self._squared_weight_sum = self._decay**2 * self._squared_weight_sum + 1
+            alpha = 1 / self._weight_sum
+            deviation = observation - self._mean
+            self._mean += alpha * deviation
+            self._scatter += alpha * np.outer(deviation, deviation)
+            self._scatter *= 1 - alpha
+
+    def calibration(
+            self) -> Union[Tuple[np.ndarray, np.ndarray], Tuple[pd.DataFrame, pd.DataFrame]]:
+        """Method for getting the current mean vector and covariance matrix.
+
+        Returns:
+            Mean vector with shape (I, 1) and covariance matrix with shape (I, I).
+        """
+        mean = self._mean[:, np.newaxis].copy()
+        cov_matrix = self._scatter / (1 - self._squared_weight_sum / self._weight_sum**2)
+        if self._simulation_names is not None:
+            mean = pd.DataFrame(mean, index=self._simulation_names, columns=['Mean'])
+            cov_matrix = pd.DataFrame(
+                cov_matrix, index=enumerate(self._simulation_names))
+        return mean, cov_matrix
+
+
 class FullyFlexibleResampling:
-    """Fully Flexible Resampling (FFR) class for simulaton with one state variable.
+    """Fully Flexible Resampling (FFR) class for simulaton with crisp state conditioning.
 
     The Fully Flexible Resampling (FFR) method was first introduced in Chapter 3 of
     the Portfolio Construction and Risk Management book.
@@ -83,101 +204,435 @@ class FullyFlexibleResampling:
         else:
             self._stationary_transformations = stationary_transformations
         self._T = self._stationary_transformations.shape[0]
+        self._cached_cdfs = (None, None)
+
+    def _compute_states(
+            self, state_variables: np.ndarray, conditioning_values: list) -> np.ndarray:
+        """Computes the joint state of each historical observation.
 
-    def _compute_crisp_indices(
-            self, state_variable: np.ndarray, conditioning_values: list[float]) -> np.ndarray:
-        conditioning_values.sort()
-        crisp_indices = np.full((self._T, len(conditioning_values) + 1), np.nan)
-        crisp_indices[:, 0] = (state_variable <= conditioning_values[0])
-        if np.all(crisp_indices[:, 0] == 0):
+        The joint states are numbered lexicographically by the conditioning ranges of
+        the state variables, with joint ranges that do not contain any observations
+        removed from the numbering.
+        """
+        num_variables = state_variables.shape[1]
+        ranges = np.empty((self._T, num_variables), dtype=int)
+        num_ranges = []
+        for v in range(num_variables):
+            values = np.sort(conditioning_values[v])
+            ranges[:, v] = np.searchsorted(values, state_variables[:, v], side='left')
+            self._check_conditioning_ranges(
+                values, np.bincount(ranges[:, v], minlength=len(values) + 1))
+            num_ranges.append(len(values) + 1)
+        joint_ranges = np.ravel_multi_index(tuple(ranges.T), num_ranges)
+        return np.unique(joint_ranges, return_inverse=True)[1]
+
+    @staticmethod
+    def _check_conditioning_ranges(values: np.ndarray, counts: np.ndarray):
+        if counts[0] == 0:
             raise ValueError(
                 'State variable has conditioning range (-infinity, '
-                + f'{conditioning_values[0]}] which does not contain any observations.')
-        for i, value in enumerate(conditioning_values[1:], start=1):
-            indices = ((state_variable <= value) - np.sum(crisp_indices[:, 0:i], axis=1))
-            if np.all(indices == 0):
+                + f'{values[0]}] which does not contain any observations.')
+        for i in range(1, len(values)):
+            if counts[i] == 0:
                 raise ValueError(
                     'State variable has conditioning range '
-                    + f'[{conditioning_values[i - 1]}, {value}] which does not contain any '
+                    + f'[{values[i - 1]}, {values[i]}] which does not contain any '
                     + 'observations.')
-            crisp_indices[:, i] = indices
-        crisp_indices[:, -1] = (state_variable > conditioning_values[-1])
-        if np.all(crisp_indices[:, -1] == 0):
+        if counts[-1] == 0:
             raise ValueError(
-                f'State variable has conditioning range [{conditioning_values[-1]}, '
+                f'State variable has conditioning range [{values[-1]}, '
                 + 'infinity) which does not contain any observations.')
-        return crisp_indices.astype(bool)
-
-    def _entropy_pooling_state(
-            self, p: np.ndarray, state: np.ndarray, mean: float, vol: float) -> np.ndarray:
-        A = np.vstack((np.ones((1, self._T)), state.T))
-        b = np.array([[1], [mean]])
-        G = (state - mean).T**2
-        h = np.array([[vol**2]])
-        return entropy_pooling(p, A, b, G, h)
 
     def _individual_probabilities(
-            self, p: np.ndarray, state_variable: np.ndarray, crisp_indices: np.ndarray) -> list:
-        """Computes the posterior probabilities for each of the ranges."""
-        individual_probabilities = np.full((self._T, crisp_indices.shape[1]), np.nan)
-        for i in range(crisp_indices.shape[1]):
-            ind = crisp_indices[:, i]
-            mean = np.mean(state_variable[ind])
-            vol = np.std(state_variable[ind])
-            individual_probabilities[:, i] = self._entropy_pooling_state(
-                p, state_variable, mean, vol)[:, 0]
+            self, p: np.ndarray, state_variables: np.ndarray, states_vector: np.ndarray,
+            workers: int) -> np.ndarray:
+        """Computes the posterior probabilities for each of the states.
+
+        Given the normalization and mean constraints, the volatility views are equivalent
+        to views on the second moments. All states therefore share the constraint rows
+        [1; z; z^2], where z are the standardized state variables, and only differ in the
+        right hand side. The states are solved in contiguous chunks, and each solve is
+        initialized with the Lagrange multipliers of the neighboring state.
+        """
+        num_variables = state_variables.shape[1]
+        standardized_states = (
+            (state_variables - np.mean(state_variables, axis=0))
+            / np.std(state_variables, axis=0))
+        lhs = np.vstack((np.ones(self._T), standardized_states.T, standardized_states.T**2))
+        bounds = Bounds(
+            [-np.inf] * (num_variables + 1) + [0] * num_variables,
+            [np.inf] * (2 * num_variables + 1))
+        log_p = np.log(p)
+
+        counts = np.bincount(states_vector)
+        num_states = len(counts)
+        rhs = np.ones((num_states, 2 * num_variables + 1, 1))
+        for v in range(num_variables):
+            rhs[:, v + 1, 0] = np.bincount(
+                states_vector, weights=standardized_states[:, v]) / counts
+            rhs[:, num_variables + v + 1, 0] = np.bincount(
+                states_vector, weights=standardized_states[:, v]**2) / counts
+
+        individual_probabilities = np.full((self._T, num_states), np.nan)
+
+        def solve_chunk(states: np.ndarray):
+            multipliers = None
+            for i in states:
+                q, multipliers = _entropy_pooling(
+                    log_p, lhs, rhs[i], bounds, 'TNC', multipliers, polish=True)
+                individual_probabilities[:, i] = q[:, 0]
+
+        chunks = np.array_split(np.arange(num_states), min(workers, num_states))
+        if len(chunks) == 1:
+            solve_chunk(chunks[0])
+        else:
+            with ThreadPoolExecutor(max_workers=len(chunks)) as executor:
+                list(executor.map(_in_context(solve_chunk), chunks))
         return individual_probabilities
 
+    @_profiled
     def compute_probabilities(
-            self, state_variable: np.ndarray, conditioning_values: list, half_life: int = None
-            ) -> Tuple[np.ndarray, np.ndarray]:
+            self, state_variable: np.ndarray, conditioning_values: list, half_life: int = None,
+            workers: int = None, cache_dir: str = None) -> Tuple[np.ndarray, np.ndarray]:
         """Method for computing the Fully Flexible Resampling probabilities.
 
+        For multiple state variables, the states are given by the joint conditioning
+        ranges that contain historical observations. They are numbered lexicographically
+        with the first state variable varying slowest.
+
+        If a cache directory is given, the probabilities, states vector, and per-state
+        resampling distributions are stored in a file named by a hash of the inputs,
+        and later calls with the same inputs load the results from this file. The
+        simulation methods reuse the resampling distributions as long as they are given
+        probabilities with the same values.
+
         Args:
-            state_variable: Time series for the state variable with shape (T_tilde, 1).
-            conditioning_values: Conditioning values used to define the crisp probability bands.
+            state_variable: Time series for the state variables with shape (T_tilde,) or
+                (T_tilde, V).
+            conditioning_values: Conditioning values used to define the crisp probability
+                bands, given as a list with V lists if there are multiple state variables.
+                A single state variable accepts both a flat list and a list with one list.
             half_life: Half life parameter for exponentially decaying prior probabilities.
                 Default: uniform probabilities.
+            workers: Number of threads used to solve the state problems. Default: 1.
+            cache_dir: Optional directory for cached probabilities.
 
         Returns:
             Matrix with Fully Flexible Resampling probabilities and historical
             states vector.
+
+        Raises:
+            ValueError: If a conditioning range is empty, the state variables do not have
+                T_tilde observations, the number of conditioning value lists does not match
+                the number of state variables, or workers is not a positive integer.
         """
+        if workers is None:
+            workers = 1
+        elif type(workers) is not int or workers < 1:
+            raise ValueError('workers must be a positive integer.')
+
+        state_variables = np.asarray(state_variable)
+        if state_variables.ndim == 1 or state_variables.shape[1] == 1:
+            state_variables = np.reshape(state_variables, (-1, 1))
+            conditioning_values = [np.ravel(conditioning_values)]
+        elif len(conditioning_values) != state_variables.shape[1]:
+            raise ValueError(
+                f'conditioning_values must contain {state_variables.shape[1]} lists, '
+                + f'given {len(conditioning_values)}.')
+        if state_variables.shape[0] != self._T:
+            raise ValueError(
+                f'state_variable must contain {self._T} observations, '
+                + f'given {state_variables.shape[0]}.')
+
+        if cache_dir is not None:
+            cache_file = os.path.join(cache_dir, 'ffr_' + self._cache_key(
+                state_variables, conditioning_values, half_life) + '.npz')
+            if os.path.isfile(cache_file):
+                with np.load(cache_file) as cached:
+                    probabilities = cached['probabilities']
+                    self._cached_cdfs = (self._cdf_key(probabilities), cached['cdfs'])
+                    return probabilities, cached['states_vector']
+
         if half_life is None:
             p = np.ones((self._T, 1)) / self._T
         else:
-            p = exp_decay_probs(state_variable, half_life)
+            p = exp_decay_probs(state_variables, half_life)
+
+        state_vector = self._compute_states(state_variables, conditioning_values)
+        probabilities = self._individual_probabilities(p, state_variables, state_vector, workers)
+        probabilities /= np.sum(probabilities, axis=0)
 
-        crisp_indices = self._compute_crisp_indices(state_variable, conditioning_values)
-        probabilities = self._individual_probabilities(p, state_variable, crisp_indices)
-        state_vector = (crisp_indices @ np.arange(len(conditioning_values) + 1)).astype(int)
-        return probabilities / np.sum(probabilities, axis=0), state_vector
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+            temporary_file = f'{cache_file[:-4]}_{os.getpid()}.tmp.npz'
+            np.savez(
+                temporary_file, probabilities=probabilities, states_vector=state_vector,
+                cdfs=self._state_cdfs(probabilities))
+            os.replace(temporary_file, cache_file)
+        return probabilities, state_vector
 
+    @staticmethod
+    def _cache_key(
+            state_variables: np.ndarray, conditioning_values: list, half_life: int) -> str:
+        """Computes a hash of the probability inputs used to name cached results."""
+        key = hashlib.sha256(b'ffr-probabilities-v2')
+        key.update(repr(state_variables.shape).encode())
+        key.update(np.ascontiguousarray(state_variables, dtype=float).tobytes())
+        for values in conditioning_values:
+            key.update(np.sort(np.asarray(values, dtype=float)).tobytes() + b';')
+        key.update(repr(None if half_life is None else float(half_life)).encode())
+        return key.hexdigest()
+
+    @staticmethod
+    def _cdf_key(probabilities: np.ndarray) -> tuple:
+        """Computes a checksum of the probabilities used to validate cached CDFs."""
+        probabilities = np.ascontiguousarray(probabilities)
+        return probabilities.shape, probabilities.dtype.str, zlib.crc32(probabilities)
+
+    def _state_cdfs(self, probabilities: np.ndarray) -> np.ndarray:
+        """Computes the cumulative resampling distribution for each state as rows.
+
+        The normalization matches np.random.choice, so inverse transform sampling
+        with the same uniform draws gives identical resampled indices. The result is
+        cached for the most recently used probabilities, which are identified by a
+        checksum of their values so that in-place modifications are detected.
+        """
+        key = self._cdf_key(probabilities)
+        if self._cached_cdfs[0] != key:
+            cdfs = np.cumsum(probabilities.T, axis=1)
+            cdfs /= cdfs[:, -1:]
+            self._cached_cdfs = (key, cdfs)
+        return self._cached_cdfs[1]
+
+    @_profiled
     def simulate(
             self, S: int, H: int, probabilities: np.ndarray, states_vector: np.ndarray,
-            initial_state: int = None) -> np.ndarray:
+            initial_state: int = None,
+            seed: Union[int, np.random.SeedSequence, np.random.Generator] = None,
+            workers: int = None, path: str = None) -> np.ndarray:
         """Simulation method for Fully Flexible Resampling.
 
+        If a seed is given, the paths are split into fixed-size blocks that are
+        simulated using independent streams spawned from the seed. The result is
+        therefore reproducible for a given seed regardless of the number of workers.
+
         Args:
             S: Number of simulated future paths.
             H: Simulation horizon.
             probabilities: The resampling probabilities for each state.
             states_vector: Vector containing the historical states.
             initial_state: Optional initial state. Default: the latest state.
+            seed: Optional seed, SeedSequence, or Generator used to spawn the block
+                streams. Default: the global np.random state.
+            workers: Number of threads used to simulate the blocks. Requires a seed.
+                Default: 1.
+            path: Optional .npy file path that the simulation is written to block by
+                block, in which case a memory-mapped array is returned.
 
         Returns:
             Resampled stationary transformations simulations with shape (S, I, H).
+
+        Raises:
+            ValueError: If workers is not a positive integer or given without a seed.
+        """
+        shape = (S, self._stationary_transformations.shape[1], H)
+        if path is None:
+            stationary_sim = np.empty(shape, dtype=self._stationary_transformations.dtype)
+        else:
+            stationary_sim = open_memmap(
+                path, mode='w+', dtype=self._stationary_transformations.dtype, shape=shape)
+
+        for start, end, sim_indices in self._block_indices(
+                S, H, probabilities, states_vector, initial_state, seed, workers):
+            stationary_sim[start:end] = np.swapaxes(
+                self._stationary_transformations[sim_indices], axis1=1, axis2=2)
+
+        if path is not None:
+            stationary_sim.flush()
+        return stationary_sim
+
+    def simulate_blocks(
+            self, S: int, H: int, probabilities: np.ndarray, states_vector: np.ndarray,
+            initial_state: int = None,
+            seed: Union[int, np.random.SeedSequence, np.random.Generator] = None,
+            workers: int = None) -> Iterator[np.ndarray]:
+        """Generator version of the simulate method for simulations that do not fit in memory.
+
+        The arguments are the same as for the simulate method, and concatenating the
+        blocks along the first axis gives the same simulation.
+
+        Returns:
+            Iterator over resampled stationary transformations simulations with shape
+            (S_block, I, H), where S_block is at most 10000.
+
+        Raises:
+            ValueError: If workers is not a positive integer or given without a seed.
         """
+        block_indices = self._block_indices(
+            S, H, probabilities, states_vector, initial_state, seed, workers)
+        return (np.swapaxes(self._stationary_transformations[sim_indices], axis1=1, axis2=2)
+                for _, _, sim_indices in block_indices)
+
+    @_profiled
+    def simulate_indices(
+            self, S: int, H: int, probabilities: np.ndarray, states_vector: np.ndarray,
+            initial_state: int = None,
+            seed: Union[int, np.random.SeedSequence, np.random.Generator] = None,
+            workers: int = None) -> np.ndarray:
+        """Method for simulating only the resampled historical indices.
+
+        The arguments are the same as for the simulate method. The simulation for
+        horizon h is given by stationary_transformations[indices[:, h]], so P&L
+        aggregations can gather the data lazily.
+
+        Returns:
+            Resampled indices with shape (S, H) and the smallest unsigned integer dtype
+            that can hold T_tilde - 1.
+        """
+        indices = np.empty((S, H), dtype=np.min_scalar_type(self._T - 1))
+        for start, end, sim_indices in self._block_indices(
+                S, H, probabilities, states_vector, initial_state, seed, workers):
+            indices[start:end] = sim_indices
+        return indices
+
+    @_profiled
+    def simulate_cumulative(
+            self, S: int, H: int, probabilities: np.ndarray, states_vector: np.ndarray,
+            initial_state: int = None,
+            seed: Union[int, np.random.SeedSequence, np.random.Generator] = None,
+            workers: int = None, checkpoints: list = None, log_returns: bool = None
+            ) -> Tuple[np.ndarray, np.ndarray]:
+        """Method for simulating cumulative returns and drawdowns without the path tensor.
+
+        The paths are aggregated one horizon step at a time, so memory usage is
+        proportional to the number of checkpoints instead of the horizon. The first
+        six arguments are the same as for the simulate method, and the cumulative
+        returns can be used directly as the path simulation for MeanCML.
+
+        Args:
+            checkpoints: Horizons in {1, ..., H} at which the cumulative returns are
+                stored. Default: [H].
+            log_returns: Whether the stationary transformations are log returns or
+                simple returns. Default: True.
+
+        Returns:
+            Cumulative returns with shape (S, I, len(checkpoints)) and maximum
+            drawdowns with shape (S, I).
+
+        Raises:
+            ValueError: If checkpoints are not in {1, ..., H} or log_returns is not boolean.
+        """
+        if checkpoints is None:
+            checkpoints = [H]
+        checkpoints = np.asarray(checkpoints)
+        if checkpoints.ndim != 1 or np.any((checkpoints < 1) | (checkpoints > H)):
+            raise ValueError(f'checkpoints must be a list of horizons in {{1, ..., {H}}}.')
+
+        if log_returns is None:
+            log_returns = True
+        elif type(log_returns) is not bool:
+            raise ValueError('log_returns must be either True or False.')
+
+        I = self._stationary_transformations.shape[1]
+        cumulative_returns = np.empty((S, I, len(checkpoints)))
+        max_drawdowns = np.empty((S, I))
+        checkpoint_columns = [np.flatnonzero(checkpoints == h + 1) for h in range(H)]
+        for start, end, sim_indices in self._block_indices(
+                S, H, probabilities, states_vector, initial_state, seed, workers):
+            log_wealth = np.zeros((end - start, I))
+            log_peak = np.zeros((end - start, I))
+            log_drawdown = np.zeros((end - start, I))
+            for h in range(H):
+                if log_returns:
+                    log_wealth += self._stationary_transformations[sim_indices[:, h]]
+                else:
+                    log_wealth += np.log1p(self._stationary_transformations[sim_indices[:, h]])
+                np.maximum(log_peak, log_wealth, out=log_peak)
+                np.maximum(log_drawdown, log_peak - log_wealth, out=log_drawdown)
+                if len(checkpoint_columns[h]) > 0:
+                    cumulative_returns[start:end, :, checkpoint_columns[h]] = np.expm1(
+                        log_wealth)[:, :, np.newaxis]
+            max_drawdowns[start:end] = -np.expm1(-log_drawdown)
+        return cumulative_returns, max_drawdowns
+
+    def _block_indices(
+            self, S: int, H: int, probabilities: np.ndarray, states_vector: np.ndarray,
+            initial_state: int, seed: Union[int, np.random.SeedSequence, np.random.Generator],
+            workers: int) -> Iterator[Tuple[int, int, np.ndarray]]:
+        """Validates the simulation arguments and returns an iterator over index blocks."""
         if initial_state is None:
             initial_state = states_vector[-1]
 
-        sim_indices = np.full((S, H), 1)
-        t = np.arange(len(states_vector))
-        for s in range(S):
-            current_state = initial_state
-            for h in range(H):
-                sim_indices[s, h] = np.random.choice(t, p=probabilities[:, current_state])
-                current_state = states_vector[sim_indices[s, h]]
-        stationary_sim = np.swapaxes(
-            self._stationary_transformations[sim_indices], axis1=1, axis2=2)
-        return stationary_sim
+        if workers is None:
+            workers = 1
+        elif type(workers) is not int or workers < 1:
+            raise ValueError('workers must be a positive integer.')
+
+        num_blocks = -(-S // _SIM_BLOCK_SIZE)
+        if seed is None:
+            if workers != 1:
+                raise ValueError('A seed must be given to simulate with multiple workers.')
+            streams = None
+        elif type(seed) is np.random.Generator:
+            streams = seed.spawn(num_blocks)
+        else:
+            if type(seed) is not np.random.SeedSequence:
+                seed = np.random.SeedSequence(seed)
+            streams = [np.random.default_rng(child) for child in seed.spawn(num_blocks)]
+
+        cdfs = self._state_cdfs(probabilities)
+
+        def simulate_block(block: int) -> Tuple[int, int, np.ndarray]:
+            start = block * _SIM_BLOCK_SIZE
+            end = min(start + _SIM_BLOCK_SIZE, S)
+            if streams is None:
+                uniform_samples = np.random.random_sample((end - start, H))
+            else:
+                uniform_samples = streams[block].random((end - start, H))
+            return start, end, self._simulate_indices(
+                cdfs, states_vector, initial_state, uniform_samples)
+
+        if workers == 1:
+            return map(simulate_block, range(num_blocks))
+
+        def parallel_blocks() -> Iterator[Tuple[int, int, np.ndarray]]:
+            """Keeps at most two blocks per worker in flight, so memory stays bounded."""
+            pending = deque()
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                try:
+                    for block in range(num_blocks):
+                        if len(pending) == 2 * workers:
+                            yield pending.popleft().result()
+                        pending.append(executor.submit(simulate_block, block))
+                    while pending:
+                        yield pending.popleft().result()
+                finally:
+                    for future in pending:
+                        future.cancel()
+
+        return parallel_blocks()
+
+    @staticmethod
+    def _simulate_indices(
+            cdfs: np.ndarray, states_vector: np.ndarray, initial_state: int,
+            uniform_samples: np.ndarray) -> np.ndarray:
+        """Advances all paths one step at a time using inverse transform sampling.
+
+        The paths are grouped by their current state with a stable sort in each step,
+        so every state's contiguous CDF row is searched once for all of its paths.
+        """
+        S, H = uniform_samples.shape
+        sim_indices = np.empty((S, H), dtype=int)
+        current_states = np.full(S, initial_state)
+        for h in range(H):
+            order = np.argsort(current_states, kind='stable')
+            sorted_states = current_states[order]
+            sorted_samples = uniform_samples[order, h]
+            group_starts = np.flatnonzero(np.diff(sorted_states)) + 1
+            sorted_indices = np.empty(S, dtype=int)
+            for start, end in zip(np.r_[0, group_starts], np.r_[group_starts, S]):
+                sorted_indices[start:end] = np.searchsorted(
+                    cdfs[sorted_states[start]], sorted_samples[start:end], side='right')
+            sim_indices[order, h] = sorted_indices
+            current_states = states_vector[sim_indices[:, h]]
+        return sim_indices
@@ -19,12 +19,16 @@ import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from fortitudo.tech import (
-    entropy_pooling, MeanCVaR, cvar_options, MeanVariance, load_parameters,
-    simulation_moments, covariance_matrix, correlation_matrix, portfolio_cvar,
+    entropy_pooling, MeanCVaR, MeanCML, cvar_options, MeanVariance, load_parameters,
+    simulation_moments, covariance_matrix, correlation_matrix, portfolio_cvar, portfolio_cml,
     portfolio_var, portfolio_vol, load_pnl, load_risk_factors, load_time_series,
-    plot_vol_surface, forward, call_option, put_option, FullyFlexibleResampling,
-    exp_decay_probs, normal_exp_decay_calib, exposure_stacking)
+    plot_vol_surface, forward, call_option, put_option, option_prices, option_greeks,
+    implied_volatility, option_pnl, FullyFlexibleResampling,
+    exp_decay_probs, normal_exp_decay_calib, normal_exp_decay_calib_grid, exposure_stacking,
+    EfficientFrontier, ExpDecayEstimator, ScenarioStore, Profiler, entropy_pooling_async,
+    efficient_portfolio_async, efficient_frontier_async)
 
+from fortitudo.tech.entropy_pooling import _entropy_pooling
 from fortitudo.tech.functions import _simulation_check
 
 R = load_pnl()
@@ -0,0 +1,100 @@
+# fortitudo.tech - Novel Investment Technologies.
+# Copyright (C) 2021-2025 Fortitudo Technologies.
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+import threading
+import time
+import numpy as np
+import pytest
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+from context import (R, entropy_pooling, MeanCVaR, MeanVariance, entropy_pooling_async,
+                     efficient_portfolio_async, efficient_frontier_async)
+
+tol = 1e-7
+
+R = R.values
+S, I = R.shape
+G = -np.eye(I)
+h = np.zeros(I)
+opt_cvar = MeanCVaR(R, G, h)
+opt_variance = MeanVariance(np.mean(R, axis=0), np.cov(R, rowvar=False), G, h)
+
+
+async def _collect(optimization, num_portfolios, stop=None):
+    portfolios = []
+    async for portfolio in efficient_frontier_async(optimization, num_portfolios):
+        portfolios.append(portfolio)
+        if len(portfolios) == stop:
+            break
+    return portfolios
+
+
+def test_entropy_pooling_async():
+    p = np.ones((S, 1)) / S
+    A = np.vstack((np.ones((1, S)), R[:, :2].T))
+    b = np.vstack(([[1]], np.mean(R[:, :2], axis=0)[:, np.newaxis] + 0.01))
+    q = asyncio.run(entropy_pooling_async(p, A, b))
+    assert np.max(np.abs(q - entropy_pooling(p, A, b))) <= tol
+
+
+@pytest.mark.parametrize("opt", [(opt_cvar), (opt_variance)])
+def test_efficient_portfolio_async(opt):
+    assert np.max(np.abs(asyncio.run(efficient_portfolio_async(opt))
+                         - opt.efficient_portfolio())) <= tol
+    assert np.max(np.abs(asyncio.run(efficient_portfolio_async(opt, 0.05))
+                         - opt.efficient_portfolio(0.05))) <= tol
+
+
+@pytest.mark.parametrize("opt", [(opt_cvar), (opt_variance)])
+def test_efficient_frontier_async(opt):
+    frontier = opt.efficient_frontier(5)
+    assert np.max(np.abs(np.hstack(asyncio.run(_collect(opt, 5))) - frontier)) <= tol
+    assert np.max(np.abs(np.hstack(asyncio.run(_collect(opt, 5, stop=2)))
+                         - frontier[:, :2])) <= tol
+    assert len(asyncio.run(_collect(opt, None))) == 9
+
+
+def test_cancel_event():
+    cancel_event = threading.Event()
+    cancel_event.set()
+    with pytest.raises(CancelledError):
+        opt_cvar.efficient_portfolio(cancel_event=cancel_event)
+
+
+def test_task_cancellation():
+    opt = MeanCVaR(R, G, h)
+    benders_main = opt._benders_main
+    started = threading.Event()
+    iterations = []
+
+    def slow_benders_main(*args, **kwargs):
+        iterations.append(1)
+        started.set()
+        time.sleep(0.05)
+        return benders_main(*args, **kwargs)
+
+    opt._benders_main = slow_benders_main
+
+    async def cancel_portfolio(executor):
+        task = asyncio.ensure_future(efficient_portfolio_async(opt, executor=executor))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    with ThreadPoolExecutor(1) as executor:
+        asyncio.run(cancel_portfolio(executor))
+    assert len(iterations) <= 2
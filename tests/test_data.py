@@ -14,10 +14,12 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import os
 import numpy as np
 from pandas import DataFrame
 from matplotlib.figure import Figure
-from context import load_parameters, load_risk_factors, time_series, plot_vol_surface, R
+from context import (load_parameters, load_pnl, load_risk_factors, load_time_series,
+                     time_series, plot_vol_surface, R)
 
 
 def test_load_data():
@@ -39,6 +41,31 @@ def test_time_series():
     assert np.all(time_series.values >= 0)
 
 
+def test_data_cache(tmp_path, monkeypatch):
+    pnl = load_pnl(cache_dir=str(tmp_path))
+    assert len(os.listdir(tmp_path)) == 2
+    cached_pnl = load_pnl(cache_dir=str(tmp_path))
+    assert cached_pnl.equals(pnl)
+    assert cached_pnl.equals(R)
+    values = load_pnl(as_numpy=True, cache_dir=str(tmp_path))
+    assert isinstance(values, np.ndarray)
+    assert not isinstance(values, np.memmap)
+    assert np.all(values == R.values)
+    cached_pnl.iloc[0, 0] = 1.
+    assert load_pnl(cache_dir=str(tmp_path)).iloc[0, 0] == R.iloc[0, 0]
+
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path))
+    assert load_time_series().equals(time_series)
+    assert len(os.listdir(tmp_path / 'fortitudo.tech')) == 2
+
+    not_a_directory = tmp_path / 'file'
+    not_a_directory.write_text('')
+    assert load_time_series(cache_dir=str(not_a_directory)).equals(time_series)
+    values = load_time_series(as_numpy=True, cache_dir=str(not_a_directory))
+    assert type(values) is np.ndarray
+    assert np.all(values == time_series.values)
+
+
 def test_plot_vol_surface():
     fig, _ = plot_vol_surface(0, time_series.values[:, 34:69])
     assert type(fig) is Figure
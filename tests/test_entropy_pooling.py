@@ -16,7 +16,8 @@
 
 import numpy as np
 import pytest
-from context import entropy_pooling, R
+from scipy.optimize import Bounds
+from context import entropy_pooling, _entropy_pooling, R
 
 R = R.values
 S = len(R)
@@ -63,6 +64,53 @@ def test_equality_inequality(p):
     assert q.shape == (S, 1)
 
 
+@pytest.mark.parametrize("p", [p1, p2])
+def test_float32_storage(p, monkeypatch):
+    monkeypatch.setitem(_entropy_pooling.__globals__, '_DUAL_CHUNK_SIZE', 3000)
+    q = entropy_pooling(p, A, b, G, h)
+    q32 = entropy_pooling(p, A.astype(np.float32), b, G.astype(np.float32), h)
+    assert q32.dtype == np.float64
+    assert np.max(np.abs(q32 / q - 1)) <= 1e-5
+    assert np.abs(np.sum(q32) - 1) <= tol
+    log_p = np.log(p)
+    bounds = Bounds([-np.inf, -np.inf, 0], [np.inf, np.inf, np.inf])
+    lhs, rhs = np.vstack((A, G)), np.vstack((b, h))
+    q_polished = _entropy_pooling(log_p, lhs, rhs, bounds, 'TNC', polish=True)[0]
+    q32_polished = _entropy_pooling(
+        log_p, lhs.astype(np.float32), rhs, bounds, 'TNC', polish=True)[0]
+    assert np.max(np.abs(q32_polished / q_polished - 1)) <= 1e-5
+
+
 def test_method():
     with pytest.raises(ValueError):
         _ = entropy_pooling(p1, A, b, method='X')
+
+
+def test_warm_start(monkeypatch):
+    log_p = np.log(p2)
+    lhs = np.vstack((A, G))
+    rhs = np.vstack((b, h))
+    bounds = Bounds([-np.inf, -np.inf, 0], [np.inf, np.inf, np.inf])
+    q_fast = _entropy_pooling(log_p, lhs, rhs, bounds, 'TNC')[0]
+    assert np.all(q_fast == entropy_pooling(p2, A, b, G, h))
+    q, multipliers = _entropy_pooling(log_p, lhs, rhs, bounds, 'TNC', polish=True)
+    assert np.max(np.abs(A @ q - b)) <= 1e-12
+    q_perturbed = _entropy_pooling(
+        log_p, lhs, rhs, bounds, 'TNC', 1.1 * multipliers, polish=True)[0]
+    assert np.max(np.abs(q_perturbed - q)) <= tol / S
+    q_warm = _entropy_pooling(log_p, lhs, rhs, bounds, 'TNC', multipliers, polish=True)[0]
+    assert np.max(np.abs(q_warm - q)) <= tol / S
+    q_overflow = _entropy_pooling(
+        log_p, lhs, rhs, bounds, 'TNC', np.full(3, -1e6), polish=True)[0]
+    assert np.all(q_overflow == q)
+
+    minimize = _entropy_pooling.__globals__['minimize']
+
+    def failing_warm_start(*args, **kwargs):
+        dual_solution = minimize(*args, **kwargs)
+        dual_solution.success = not np.any(kwargs['x0'] != 0)
+        return dual_solution
+
+    monkeypatch.setitem(_entropy_pooling.__globals__, 'minimize', failing_warm_start)
+    q_restarted = _entropy_pooling(log_p, lhs, rhs, bounds, 'TNC', multipliers, polish=True)[0]
+    assert np.all(q_restarted == q)
@@ -17,7 +17,8 @@
 import numpy as np
 import pytest
 from context import (R, simulation_moments, covariance_matrix, correlation_matrix,
-                     _simulation_check, portfolio_cvar, portfolio_var, portfolio_vol)
+                     _simulation_check, portfolio_cvar, portfolio_cml, portfolio_var,
+                     portfolio_vol)
 
 S, I = R.shape
 simulation_names = R.columns
@@ -54,6 +55,22 @@ def test_covariance_correlation_matrix(p):
     assert np.all(corr1.values == corr2.values)
 
 
+@pytest.mark.parametrize("p", [p1, p2])
+def test_float32_storage(p, monkeypatch):
+    monkeypatch.setattr('fortitudo.tech.functions._ACCUMULATION_CHUNK_SIZE', 3000)
+    R32 = R.values.astype(np.float32)
+    moments = simulation_moments(R, p).values
+    cov = covariance_matrix(R, p).values
+    assert np.max(np.abs(simulation_moments(R32, p).values / moments - 1)) <= 1e-5
+    assert np.max(np.abs(covariance_matrix(R32, p).values - cov)) <= 1e-6 * np.max(cov)
+    for risk_function in (portfolio_cvar, portfolio_var, portfolio_vol):
+        risks = risk_function(pfs, R, p)
+        assert np.max(np.abs(risk_function(pfs, R32, p) / risks - 1)) <= 1e-6
+    R_paths = np.cumsum(np.stack((R.values, R.values[::-1]), axis=2), axis=2)
+    cmls = portfolio_cml(pfs, R_paths, p)
+    assert np.max(np.abs(portfolio_cml(pfs, R_paths.astype(np.float32), p) / cmls - 1)) <= 1e-6
+
+
 def test_simulation_check():
     simulation_names_out1, R_out1, p_out1 = _simulation_check(R, None)
     simulation_names_out2, R_out2, p_out2 = _simulation_check(R.values, p2)
@@ -113,3 +130,39 @@ def test_portfolio_vol():
     assert vol_low < vol_high
     assert np.abs(vols[0, 0] - vol_low) <= tol
     assert np.abs(vols[0, 1] - vol_high) <= tol
+
+
+def test_portfolio_vol_factor_model():
+    cov = covariance_matrix(R, p1).values
+    eigenvalues, eigenvectors = np.linalg.eigh(cov)
+    factor_loadings = eigenvectors[:, -3:]
+    factor_covariance = np.diag(eigenvalues[-3:])
+    specific_variances = np.diag(cov - factor_loadings @ factor_covariance @ factor_loadings.T)
+    factor_model = (factor_loadings, factor_covariance, specific_variances)
+    factor_cov = factor_loadings @ factor_covariance @ factor_loadings.T + np.diag(
+        specific_variances)
+    vol_low = portfolio_vol(low_risk_pf, factor_model)
+    vols = portfolio_vol(pfs, factor_model)
+    assert vols.shape == (1, 2)
+    assert np.abs(vols[0, 0] - vol_low) <= tol
+    vol_high = np.sqrt(high_risk_pf[:, 0] @ factor_cov @ high_risk_pf[:, 0])
+    assert np.abs(vols[0, 1] - vol_high) <= tol
+
+
+def test_portfolio_cml():
+    np.random.seed(3)
+    H = 4
+    R_paths = np.cumsum(np.random.normal(0, 0.01, (S, I, H)), axis=2)
+    cml = portfolio_cml(pfs, R_paths, p2, demean=False)
+    assert cml.shape == (1, 2)
+    for k in range(2):
+        max_losses = np.array([
+            max(np.max(-R_paths[s].T @ pfs[:, k]), 0) for s in range(S)])[:, np.newaxis]
+        assert np.abs(cml[0, k] - portfolio_cvar(
+            np.ones((1, 1)), -max_losses, p2, demean=False)) <= tol
+    cml_one_horizon = portfolio_cml(low_risk_pf, R.values[:, :, np.newaxis], p2, demean=False)
+    cvar_one_horizon = portfolio_cvar(low_risk_pf, R.values, p2, demean=False)
+    assert np.abs(cml_one_horizon - max(cvar_one_horizon, 0)) <= tol
+    assert portfolio_cml(low_risk_pf, R_paths, p2) > 0
+    with pytest.raises(ValueError):
+        _ = portfolio_cml(pfs, R_paths, alpha=1.1)
@@ -0,0 +1,64 @@
+# fortitudo.tech - Novel Investment Technologies.
+# Copyright (C) 2021-2025 Fortitudo Technologies.
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import subprocess
+import sys
+import pytest
+import context
+import fortitudo.tech as ft
+
+root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+@pytest.mark.parametrize("statement", [
+    'import fortitudo.tech',
+    'from fortitudo.tech import entropy_pooling, portfolio_cvar'])
+def test_lazy_imports(statement):
+    code = (f'import sys; {statement}; '
+            'print([m for m in ("matplotlib", "cvxopt") if m in sys.modules])')
+    result = subprocess.run(
+        [sys.executable, '-c', code], cwd=root, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == '[]'
+
+
+def test_silent_solvers():
+    code = ('import sys; import numpy as np; from fortitudo.tech import exposure_stacking; '
+            'exposure_stacking(2, np.random.dirichlet(np.ones(3), 4).T); '
+            'print("fortitudo.tech.optimization" in sys.modules)')
+    result = subprocess.run(
+        [sys.executable, '-c', code], cwd=root, capture_output=True, text=True, check=True)
+    assert result.stdout == 'False\n'
+
+
+def test_lazy_attributes():
+    import fortitudo.tech.simulation
+    assert callable(ft.entropy_pooling)
+    assert ft.MeanCVaR is fortitudo.tech.optimization.MeanCVaR
+    assert 'MeanCVaR' in vars(ft)
+    assert set(ft.__all__) <= set(dir(ft))
+    assert ft.__getattr__('simulation') is fortitudo.tech.simulation
+    with pytest.raises(AttributeError):
+        ft.MeanCDaR
+
+
+@pytest.mark.parametrize("submodule", [
+    'data', 'functions', 'optimization', 'option_pricing', 'simulation'])
+def test_lazy_submodules(submodule):
+    code = f'import fortitudo.tech as ft; print(ft.{submodule}.__name__)'
+    result = subprocess.run(
+        [sys.executable, '-c', code], cwd=root, capture_output=True, text=True, check=True)
+    assert result.stdout == f'fortitudo.tech.{submodule}\n'
@@ -16,8 +16,10 @@
 
 import numpy as np
 import pytest
-from context import (R, MeanCVaR, cvar_options, MeanVariance, covariance_matrix,
-                     call_option, put_option, exposure_stacking)
+from scipy.optimize import linprog
+from context import (R, MeanCVaR, MeanCML, cvar_options, MeanVariance, covariance_matrix,
+                     call_option, put_option, exposure_stacking, EfficientFrontier,
+                     portfolio_cvar, portfolio_cml, portfolio_vol)
 
 tol = 1e-7
 
@@ -97,6 +99,54 @@ def test_equality_constraint(opt):
     assert np.max(np.abs(frontier_eq[:, 0] - min_risk_eq[:, 0])) <= tol
 
 
+eigenvalues, eigenvectors = np.linalg.eigh(cov_matrix)
+factor_loadings = eigenvectors[:, -3:]
+factor_covariance = np.diag(eigenvalues[-3:])
+specific_variances = np.diag(cov_matrix - factor_loadings @ factor_covariance @ factor_loadings.T)
+factor_model = (factor_loadings, factor_covariance, specific_variances)
+factor_cov_matrix = factor_loadings @ factor_covariance @ factor_loadings.T + np.diag(
+    specific_variances)
+
+
+@pytest.mark.parametrize("G_fm, h_fm, A_fm, b_fm", [(G, h, None, None), (G, h, A, b)])
+def test_factor_model(G_fm, h_fm, A_fm, b_fm):
+    opt_factor = MeanVariance(mean, factor_model, G_fm, h_fm, A_fm, b_fm)
+    opt_dense = MeanVariance(mean, factor_cov_matrix, G_fm, h_fm, A_fm, b_fm)
+    target_return_factor = opt_factor.efficient_portfolio(0.06)
+    assert target_return_factor.shape == (I, 1)
+    assert np.abs(mean @ target_return_factor - 0.06) <= tol
+    assert np.max(np.abs(target_return_factor - opt_dense.efficient_portfolio(0.06))) <= 1e-6
+    frontier_factor = opt_factor.efficient_frontier(4)
+    assert frontier_factor.shape == (I, 4)
+    assert np.max(np.abs(frontier_factor - opt_dense.efficient_frontier(4))) <= 1e-5
+    frontier_cla = opt_factor.efficient_frontier(4, 'cla')
+    assert np.max(np.abs(frontier_cla - opt_dense.efficient_frontier(4, 'cla'))) <= 1e-6
+    _, risks, portfolios = EfficientFrontier(opt_factor).refine(max_portfolios=4)
+    assert np.max(np.abs(risks - portfolio_vol(portfolios, factor_model))) <= tol
+
+
+@pytest.mark.parametrize("opt", [(opt2), (opt3)])
+def test_adaptive_efficient_frontier(opt):
+    frontier = EfficientFrontier(opt)
+    assert opt._frontier_endpoints() is opt._frontier_endpoints()
+    return_targets, risks, portfolios = frontier.refine(max_portfolios=6)
+    assert portfolios.shape == (I, 6)
+    assert np.all(np.diff(return_targets) > 0)
+    assert np.all(np.diff(risks) > 0)
+    assert np.max(np.abs(mean @ portfolios - return_targets)) <= tol
+    if isinstance(opt, MeanCVaR):
+        assert np.max(np.abs(portfolio_cvar(portfolios, R, demean=False) - risks)) <= tol
+    else:
+        assert np.max(np.abs(portfolio_vol(portfolios, R) - risks)) <= tol
+    assert frontier.efficient_portfolio() is frontier.efficient_portfolio(return_targets[0] - 1)
+    assert frontier.efficient_portfolio(return_targets[2]) is frontier.efficient_portfolio(
+        return_targets[2])
+    assert np.abs(mean @ frontier.efficient_portfolio(0.06) - 0.06) <= tol
+    assert frontier.refine(tol=1)[2].shape == (I, 7)
+    with pytest.raises(ValueError):
+        frontier.efficient_portfolio(return_targets[-1] + 0.01)
+
+
 def test_options():
     cvar_options['demean'] = False
     opt6 = MeanCVaR(R, G, h, A, b)
@@ -111,6 +161,55 @@ def test_options():
         MeanCVaR(R, options={'reltol': 1e-9})
     with pytest.raises(ValueError):
         MeanCVaR(R, options={'abstol': 1e-3})
+    with pytest.raises(ValueError):
+        MeanCVaR(R, options={'time_limit': -1})
+    with pytest.raises(ValueError):
+        MeanCVaR(np.asarray(R)[:, :, np.newaxis])
+
+
+def test_benders_info():
+    target_return_eq, info = opt4.efficient_portfolio(0.06, return_info=True)
+    assert np.max(np.abs(target_return_eq - opt4.efficient_portfolio(0.06))) <= tol
+    assert info['status'] == 'optimal'
+    assert info['gap'] <= tol
+    assert np.abs(info['upper_bound'] - portfolio_cvar(target_return_eq, R)) <= tol
+    assert set(info['trace']) == {'lower_bound', 'upper_bound', 'lp_time'}
+    for key in info['trace']:
+        assert info['trace'][key].shape == (info['iterations'],)
+    assert np.all(np.diff(info['trace']['upper_bound']) <= 0)
+    assert np.all(info['trace']['lp_time'] >= 0)
+
+    opt_time_limit = MeanCVaR(R, G, h, A, b, options={'time_limit': 1e-6})
+    target_return_tl, info_tl = opt_time_limit.efficient_portfolio(0.06, return_info=True)
+    assert info_tl['status'] == 'time_limit'
+    assert info_tl['iterations'] == 1
+    assert np.abs(np.mean(R @ target_return_tl) - 0.06) <= tol
+    assert np.abs(info_tl['upper_bound'] - portfolio_cvar(target_return_tl, R)) <= tol
+    assert info_tl['trace']['upper_bound'][-1] >= info_tl['upper_bound'] - tol
+    assert info_tl['gap'] == info_tl['upper_bound'] - info_tl['lower_bound']
+
+    np.random.seed(2)
+    R_large = np.random.standard_t(4, (5000, 50)) / 100 + 0.001
+    opt_maxiter = MeanCVaR(R_large, -np.eye(50), np.zeros(50), options={'maxiter': 100})
+    _, info_maxiter = opt_maxiter.efficient_portfolio(return_info=True)
+    assert info_maxiter['status'] == 'maxiter'
+    assert info_maxiter['iterations'] == 101
+    assert info_maxiter['gap'] > 0
+
+
+def test_float32_losses():
+    opt_float32 = MeanCVaR(R.astype(np.float32), G, h, A, b, options={'dtype': 'float32'})
+    assert opt_float32._losses.dtype == np.float32
+    assert opt_float32._losses.nbytes == opt4._losses.nbytes // 2
+    for return_target in (None, 0.06):
+        e = opt4.efficient_portfolio(return_target)
+        e_float32 = opt_float32.efficient_portfolio(return_target)
+        assert np.max(np.abs(e_float32 - e)) <= 1e-6
+        assert np.abs(portfolio_cvar(e_float32, R) / portfolio_cvar(e, R) - 1) <= 1e-6
+    assert MeanCVaR(R, options={'dtype': np.float32})._losses.dtype == np.float32
+    for dtype in ('float16', 'x'):
+        with pytest.raises(ValueError):
+            MeanCVaR(R, options={'dtype': dtype})
 
 
 def test_infeasible_constraints():
@@ -145,3 +244,112 @@ def test_exposure_stacking():
     assert len(exposure_stacking_port) == exposure_stacking_ports.shape[0]
     assert np.all(exposure_stacking_port >= 0 - tol)
     assert np.abs(np.sum(exposure_stacking_port) - 1) <= tol
+
+
+@pytest.mark.parametrize("opt", [(opt3), (opt5)])
+def test_critical_line(opt):
+    corner_returns, corner_portfolios = opt.corner_portfolios()
+    assert corner_portfolios.shape == (I, len(corner_returns))
+    assert np.all(np.diff(corner_returns) > 0)
+    assert np.max(np.abs(mean @ corner_portfolios - corner_returns)) <= tol
+    min_risk_cla = opt.efficient_portfolio(method='cla')
+    target_return_cla = opt.efficient_portfolio(0.06, 'cla')
+    assert np.max(np.abs(min_risk_cla - opt.efficient_portfolio())) <= 1e-4
+    assert np.max(np.abs(target_return_cla - opt.efficient_portfolio(0.06))) <= 1e-6
+    assert np.abs(np.mean(R @ target_return_cla) - 0.06) <= tol
+    frontier_cla = opt.efficient_frontier(method='cla')
+    assert frontier_cla.shape == (I, 9)
+    assert np.max(np.abs(frontier_cla - opt.efficient_frontier())) <= 1e-4
+    assert np.all(frontier_cla >= -tol)
+    with pytest.raises(ValueError):
+        opt.efficient_portfolio(corner_returns[-1] + 0.01, 'cla')
+
+
+def test_critical_line_degenerate():
+    G_duplicate = np.vstack((G, G, np.zeros((1, I))))
+    h_duplicate = np.hstack((h, h, [0]))
+    opt_duplicate = MeanVariance(mean, cov_matrix, G_duplicate, h_duplicate)
+    frontier_duplicate = opt_duplicate.efficient_frontier(4, 'cla')
+    assert np.max(np.abs(frontier_duplicate - opt3.efficient_frontier(4, 'cla'))) <= 1e-6
+    A_fixed = np.eye(I)[:-1]
+    b_fixed = np.full(I - 1, 1 / I)
+    opt_fixed = MeanVariance(mean, cov_matrix, A=A_fixed, b=b_fixed)
+    frontier_fixed = opt_fixed.efficient_frontier(3, 'cla')
+    assert np.max(np.abs(frontier_fixed - 1 / I)) <= tol
+    with pytest.raises(ValueError):
+        MeanVariance(mean, np.zeros((I, I)), G, h).corner_portfolios()
+    with pytest.raises(ValueError):
+        opt1.efficient_frontier(method='cla')
+    with pytest.raises(ValueError):
+        opt3.efficient_frontier(method='X')
+
+
+def test_critical_line_not_converged(monkeypatch):
+    def cycling_segment(self, P, mean, G_active, h_active, A, b):
+        num_multipliers = len(b) + len(h_active)
+        return -np.ones(I), np.zeros(I), -np.ones(num_multipliers), np.zeros(num_multipliers)
+
+    opt_cycling = MeanVariance(mean, cov_matrix, G, h)
+    monkeypatch.setattr(MeanVariance, '_critical_line_segment', cycling_segment)
+    with pytest.raises(ValueError):
+        opt_cycling.corner_portfolios()
+
+
+def test_mean_cml():
+    np.random.seed(4)
+    S_cml, I_cml, H = 300, 4, 5
+    R_paths = np.cumsum(np.random.normal(0.002, 0.02, (S_cml, I_cml, H)), axis=2)
+    R_paths = R_paths * np.array([1., 1.5, 2., 0.5])[np.newaxis, :, np.newaxis]
+    p_cml = np.random.uniform(1, 2, (S_cml, 1))
+    p_cml = p_cml / np.sum(p_cml)
+    G_cml = np.vstack((-np.eye(I_cml), np.eye(I_cml)))
+    h_cml = np.hstack((np.zeros(I_cml), 0.5 * np.ones(I_cml)))
+    A_cml = np.ones((1, I_cml))
+    b_cml = np.ones(1)
+    alpha = 0.9
+    opt_cml = MeanCML(
+        R_paths, G_cml, h_cml, A_cml, b_cml, p=p_cml, alpha=alpha, options={'demean': False})
+
+    expected_return = (p_cml.T @ R_paths[:, :, -1])[0]
+    return_target = np.mean(expected_return)
+    num_lp = I_cml + S_cml + 1
+    c = np.hstack((np.zeros(I_cml), p_cml[:, 0] / (1 - alpha), 1))
+    G_lp = np.zeros((S_cml * H, num_lp))
+    for s in range(S_cml):
+        G_lp[s * H:(s + 1) * H, 0:I_cml] = -R_paths[s].T
+        G_lp[s * H:(s + 1) * H, I_cml + s] = -1
+    G_lp[:, -1] = -1
+    G_lp = np.vstack((G_lp, np.hstack((G_cml, np.zeros((2 * I_cml, S_cml + 1))))))
+    h_lp = np.hstack((np.zeros(S_cml * H), h_cml))
+    A_lp = np.hstack((A_cml, np.zeros((1, S_cml + 1))))
+    bounds = [(None, None)] * I_cml + [(0, None)] * S_cml + [(None, None)]
+    for target in [None, return_target]:
+        G_target, h_target = G_lp, h_lp
+        if target is not None:
+            G_target = np.vstack((G_lp, -np.hstack((expected_return, np.zeros(S_cml + 1)))))
+            h_target = np.hstack((h_lp, -target))
+        lp = linprog(c, G_target, h_target, A_lp, b_cml, bounds)
+        e_cml, info = opt_cml.efficient_portfolio(target, return_info=True)
+        cml = portfolio_cml(e_cml, R_paths, p_cml, alpha, demean=False)
+        assert info['status'] == 'optimal'
+        assert np.abs(cml - lp.fun) <= tol
+        assert np.abs(info['upper_bound'] - cml) <= tol
+        assert np.max(np.abs(e_cml[:, 0] - lp.x[0:I_cml])) <= 1e-4
+
+    frontier = opt_cml.efficient_frontier(5)
+    cmls = portfolio_cml(frontier, R_paths, p_cml, alpha, demean=False)
+    assert np.all(np.diff(cmls[0]) >= -tol)
+
+    opt_demean = MeanCML(
+        R_paths, G_cml, h_cml, A_cml, b_cml, p=p_cml, alpha=alpha, options={'demean': True})
+    opt_float32 = MeanCML(R_paths, G_cml, h_cml, A_cml, b_cml, p=p_cml, alpha=alpha,
+                          options={'demean': True, 'dtype': 'float32'})
+    assert opt_float32._losses.dtype == np.float32
+    assert np.max(np.abs(
+        opt_float32.efficient_portfolio() - opt_demean.efficient_portfolio())) <= 1e-6
+    with pytest.raises(ValueError):
+        MeanCML(R_paths[:, :, -1])
+    adaptive_frontier = EfficientFrontier(opt_demean)
+    _, risks, portfolios = adaptive_frontier.refine(1e-3, 8)
+    assert np.max(np.abs(
+        risks - portfolio_cml(portfolios, R_paths, p_cml, alpha)[0])) <= tol
@@ -16,7 +16,8 @@
 
 import numpy as np
 import pytest
-from context import time_series, forward, call_option, put_option
+from context import (time_series, forward, call_option, put_option, option_prices,
+                     option_greeks, implied_volatility)
 
 tol = 1e-8
 i = np.random.randint(0, len(time_series))
@@ -50,3 +51,87 @@ def test_put_bounds(put_price, strike):
 def test_put_call_parity(put_price, call_price, strike):
     call_parity = put_price + S_0 - disc_factor * strike * F
     assert np.abs(call_parity - call_price) <= tol
+
+
+def test_option_prices():
+    maturities = np.array([1 / 12, 0.25, 0.5, 1, 2])[np.newaxis, np.newaxis, :]
+    rates = time_series[['1m', '3m', '6m', '1y', '2y']].values[-20:, np.newaxis, :] / 100
+    strikes = np.array([0.9, 0.95, 0.975, 1, 1.025, 1.05, 1.1])[np.newaxis, :, np.newaxis]
+    forwards = forward(time_series['Equity Index'].values[-20:, np.newaxis, np.newaxis],
+                       rates, 0, maturities)
+    sigmas = np.full((20, 7, 5), sigma) * np.linspace(0.8, 1.2, 7)[:, np.newaxis]
+    call_prices, put_prices = option_prices(
+        forwards, strikes * forwards, sigmas, rates, maturities)
+    assert call_prices.shape == (20, 7, 5)
+    assert np.all(call_prices == call_option(
+        forwards, strikes * forwards, sigmas, rates, maturities))
+    assert np.all(put_prices == put_option(
+        forwards, strikes * forwards, sigmas, rates, maturities))
+
+    out = (np.empty((20, 7, 5)), np.empty((20, 7, 5)))
+    call_out, put_out = option_prices(
+        forwards, strikes * forwards, sigmas, rates, maturities, out=out)
+    assert call_out is out[0]
+    assert put_out is out[1]
+    assert np.all(call_out == call_prices)
+    assert np.all(put_out == put_prices)
+
+    call_scalar, put_scalar = option_prices(F, F, sigma, r, T)
+    assert np.abs(call_scalar - call) <= tol
+    assert np.abs(put_scalar - put) <= tol
+
+
+@pytest.mark.parametrize("option, price_function", [('call', call_option), ('put', put_option)])
+def test_option_greeks(option, price_function):
+    forwards = F * np.array([0.8, 0.95, 1, 1.05, 1.2])
+    maturities = np.array([0.1, 0.5, 1, 2, 5])
+    greeks = option_greeks(forwards, F, sigma, r, maturities)
+    assert list(greeks.keys()) == [
+        'call', 'put', 'call_delta', 'put_delta', 'gamma', 'vega',
+        'call_theta', 'put_theta', 'call_rho', 'put_rho']
+    assert np.all(greeks[option] == price_function(forwards, F, sigma, r, maturities))
+
+    h = 1e-4 * F
+    delta = (price_function(forwards + h, F, sigma, r, maturities)
+             - price_function(forwards - h, F, sigma, r, maturities)) / (2 * h)
+    gamma = (price_function(forwards + h, F, sigma, r, maturities)
+             - 2 * greeks[option] + price_function(forwards - h, F, sigma, r, maturities)) / h**2
+    h = 1e-5
+    vega = (price_function(forwards, F, sigma + h, r, maturities)
+            - price_function(forwards, F, sigma - h, r, maturities)) / (2 * h)
+    theta = -(price_function(forwards, F, sigma, r, maturities + h)
+              - price_function(forwards, F, sigma, r, maturities - h)) / (2 * h)
+    rho = (price_function(forwards, F, sigma, r + h, maturities)
+           - price_function(forwards, F, sigma, r - h, maturities)) / (2 * h)
+    assert np.max(np.abs(greeks[f'{option}_delta'] - delta)) <= 1e-6
+    assert np.max(np.abs(greeks['gamma'] - gamma) / greeks['gamma']) <= 1e-4
+    assert np.max(np.abs(greeks['vega'] - vega) / greeks['vega']) <= 1e-6
+    assert np.max(np.abs(greeks[f'{option}_theta'] - theta)) <= 1e-6 * F
+    assert np.max(np.abs(greeks[f'{option}_rho'] - rho)) <= 1e-6 * F
+
+    requested = option_greeks(forwards, F, sigma, r, maturities, [f'{option}_rho', 'gamma'])
+    assert list(requested.keys()) == [f'{option}_rho', 'gamma']
+    assert np.all(requested['gamma'] == greeks['gamma'])
+    with pytest.raises(ValueError):
+        option_greeks(forwards, F, sigma, r, maturities, ['charm'])
+
+
+def test_implied_volatility():
+    strikes = F * np.exp(np.linspace(-1, 1, 41))[:, np.newaxis]
+    maturities = np.array([1 / 12, 0.25, 1, 5])
+    sigmas = np.linspace(0.05, 1, 20)[:, np.newaxis, np.newaxis]
+    call_prices, put_prices = option_prices(F, strikes, sigmas, r, maturities)
+    call_vols = implied_volatility(call_prices, F, strikes, r, maturities)
+    put_vols = implied_volatility(put_prices, F, strikes, r, maturities, call=False)
+    time_values = call_prices - np.exp(-r * maturities) * np.maximum(F - strikes, 0)
+    informative = time_values > 1e-8 * F
+    assert call_vols.shape == (20, 41, 4)
+    assert np.max(np.abs(call_vols - sigmas)[informative]) <= 1e-6
+    assert np.max(np.abs(put_vols - sigmas)[informative]) <= 1e-6
+
+    calls = np.array([True, False])
+    prices = np.array([call_105, put_105])
+    assert np.max(np.abs(implied_volatility(prices, F, 1.05 * F, r, T, calls) - sigma_105)) <= tol
+    assert np.isnan(implied_volatility(np.array([0, S_0, -call]), F, F, r, T)).all()
+    assert np.isnan(implied_volatility(call, F, F, r, 0))
+    assert np.abs(implied_volatility(call, F, F, r, T, max_iter=1) - sigma) <= 1e-2
@@ -0,0 +1,120 @@
+# fortitudo.tech - Novel Investment Technologies.
+# Copyright (C) 2021-2025 Fortitudo Technologies.
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+import threading
+import numpy as np
+from context import (R, time_series, Profiler, MeanCVaR, MeanCML, entropy_pooling,
+                     FullyFlexibleResampling, efficient_portfolio_async)
+
+S, I = R.shape
+p = np.ones((S, 1)) / S
+
+
+def test_profiler():
+    events = []
+    with Profiler(callback=lambda *event: events.append(event)) as profiler:
+        with Profiler() as inner_profiler:
+            opt = MeanCVaR(R.values, -np.eye(I), np.zeros(I))
+            _, info = opt.efficient_portfolio(return_info=True)
+        entropy_pooling(p, R.values[:, :2].T, np.mean(R.values[:, :2], axis=0)[:, np.newaxis])
+        ffr = FullyFlexibleResampling(np.diff(np.log(time_series.values[:, :2]), axis=0))
+        state = time_series['1m100'].values[1:]
+        probabilities, states = ffr.compute_probabilities(state, [np.median(state)])
+        ffr.simulate(100, 5, probabilities, states, seed=1)
+
+    summary = profiler.summary()
+    assert summary['MeanCVaR.__init__']['calls'] == 1
+    assert summary['MeanCVaR._benders_algorithm']['calls'] == 1
+    assert summary['MeanCVaR._benders_algorithm']['iterations'] == info['iterations']
+    for phase in ('MeanCVaR._benders_main', 'MeanCVaR._benders_cut', 'glpk.lp'):
+        assert summary[phase]['calls'] == info['iterations']
+    assert np.abs(summary['glpk.lp']['seconds'] - np.sum(info['trace']['lp_time'])) <= 1e-9
+    assert summary['MeanCVaR._calculate_max_expected_return']['calls'] == 1
+    assert summary['scipy.minimize']['calls'] == 3
+    assert summary['scipy.minimize']['iterations'] > 0
+    assert summary['_dual_objective']['calls'] >= summary['scipy.minimize']['iterations']
+    assert summary['FullyFlexibleResampling.compute_probabilities']['calls'] == 1
+    assert summary['FullyFlexibleResampling.simulate']['calls'] == 1
+    assert summary['MeanCVaR._benders_main']['seconds'] > summary['glpk.lp']['seconds']
+
+    inner_summary = inner_profiler.summary()
+    assert inner_summary['MeanCVaR._benders_main'] == summary['MeanCVaR._benders_main']
+    assert 'scipy.minimize' not in inner_summary
+    assert len(events) == sum(phase['calls'] for phase in summary.values()) + 1
+
+    entropy_pooling(p, R.values[:, :2].T, np.mean(R.values[:, :2], axis=0)[:, np.newaxis])
+    assert profiler.summary() == summary
+
+
+def test_profiler_threads():
+    profiler = Profiler()
+
+    def record():
+        for _ in range(1000):
+            profiler.record('phase', 1., iterations=2)
+
+    threads = [threading.Thread(target=record) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert profiler.summary() == {'phase': {'calls': 4000, 'seconds': 4000., 'iterations': 8000}}
+
+
+def test_profiler_class_names():
+    opt = MeanCML(R.values[:, :, np.newaxis], -np.eye(I), np.zeros(I))
+    with Profiler() as profiler:
+        _, info = opt.efficient_portfolio(return_info=True)
+    summary = profiler.summary()
+    assert summary['MeanCML._benders_algorithm']['calls'] == 1
+    assert summary['MeanCML._benders_algorithm']['iterations'] == info['iterations']
+    assert summary['MeanCML._benders_cut']['calls'] == info['iterations']
+    assert not any(phase.startswith('MeanCVaR') for phase in summary)
+
+
+def test_profiler_contexts():
+    ffr = FullyFlexibleResampling(np.diff(np.log(time_series.values[:, :2]), axis=0))
+    state = time_series['1m100'].values[1:]
+    conditioning_values = list(np.percentile(state, [25, 50, 75]))
+    summaries = {}
+    barrier = threading.Barrier(2)
+
+    def profile(name: str, workers: int):
+        with Profiler() as profiler:
+            barrier.wait()
+            ffr.compute_probabilities(state, conditioning_values[:workers], workers=workers)
+        summaries[name] = profiler.summary()
+
+    threads = [threading.Thread(target=profile, args=(f'workers{workers}', workers))
+               for workers in (1, 3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert summaries['workers1']['scipy.minimize']['calls'] == 2
+    assert summaries['workers3']['scipy.minimize']['calls'] == 4
+
+    async def profiled_requests():
+        async def request():
+            with Profiler() as profiler:
+                await efficient_portfolio_async(opt)
+            return profiler.summary()
+        return await asyncio.gather(request(), request())
+
+    opt = MeanCVaR(R.values, -np.eye(I), np.zeros(I))
+    for summary in asyncio.run(profiled_requests()):
+        assert summary['MeanCVaR._benders_algorithm']['calls'] == 1
@@ -0,0 +1,129 @@
+# fortitudo.tech - Novel Investment Technologies.
+# Copyright (C) 2021-2025 Fortitudo Technologies.
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import numpy as np
+import pandas as pd
+import pytest
+from context import time_series, forward, call_option, put_option, option_pnl
+
+tenors = ['1m', '3m', '6m', '1y', '2y']
+tenor_years = np.array([1 / 12, 0.25, 0.5, 1, 2])
+strikes = ['90', '95', '97_5', '100', '102_5', '105', '110']
+moneyness = np.array([0.9, 0.95, 0.975, 1, 1.025, 1.05, 1.1])
+vol_surface = pd.DataFrame(
+    [[f'{tenor}{strike}' for strike in strikes] for tenor in tenors],
+    index=tenor_years, columns=moneyness)
+rate_curve = pd.Series(tenors, index=tenor_years)
+
+factors = time_series[['Equity Index'] + tenors + list(vol_surface.values.ravel())].copy()
+factors.iloc[:, 1:] /= 100
+current = factors.iloc[-1]
+scenarios = factors.iloc[-300:-1]
+spot = current['Equity Index']
+instruments = pd.DataFrame({
+    'type': ['put', 'put', 'call', 'call', 'call', 'put'],
+    'strike': spot * np.array([0.8, 0.97, 1, 1.04, 1.25, 1.1]),
+    'maturity': [0.5, 1 / 12, 0.3, 1, 3, 0.1],
+    'underlying': 'Equity Index'}, index=['P80', 'P97', 'C100', 'C104', 'C125', 'P110'])
+
+
+def reference_values(
+        factor_values: pd.Series, horizon: float, dividend_yields: np.ndarray = None
+        ) -> np.ndarray:
+    if dividend_yields is None:
+        dividend_yields = np.zeros(len(instruments))
+    values = np.full(len(instruments), np.nan)
+    underlying = factor_values['Equity Index']
+    for i, (option_type, K, T) in enumerate(instruments[['type', 'strike', 'maturity']].values):
+        tau = T - horizon
+        if tau <= 0:
+            values[i] = max(underlying - K, 0) if option_type == 'call' else max(
+                K - underlying, 0)
+            continue
+        r = np.interp(tau, tenor_years, factor_values[tenors].values.astype(float))
+        smile = [np.interp(tau, tenor_years, factor_values[vol_surface[m]].values.astype(float))
+                 for m in moneyness]
+        sigma = np.interp(K / underlying, moneyness, smile)
+        price_function = call_option if option_type == 'call' else put_option
+        F = forward(underlying, r, dividend_yields[i], tau)
+        values[i] = price_function(F, K, sigma, r, tau)
+    return values
+
+
+@pytest.mark.parametrize("horizon", [0, 0.2])
+def test_option_pnl(horizon):
+    pnl, prices = option_pnl(
+        instruments, scenarios, current, {'Equity Index': vol_surface}, rate_curve, horizon)
+    assert pnl.shape == (len(scenarios), len(instruments))
+    assert np.all(pnl.columns == instruments.index)
+    assert np.all(pnl.index == scenarios.index)
+    current_values = reference_values(current, 0)
+    assert np.max(np.abs(prices.values - current_values)) <= 1e-10 * spot
+    for s in [0, 150, len(scenarios) - 1]:
+        reference = reference_values(scenarios.iloc[s], horizon) - current_values
+        assert np.max(np.abs(pnl.iloc[s].values - reference)) <= 1e-10 * spot
+
+    pnl_chunked, _ = option_pnl(
+        instruments, scenarios, current, {'Equity Index': vol_surface}, rate_curve, horizon,
+        chunk_size=64, workers=3)
+    assert np.all(pnl_chunked.values == pnl.values)
+
+
+def test_option_pnl_dividend_yield():
+    dividend_yields = np.array([0.02, 0., 0.03, 0.01, 0.04, 0.02])
+    pnl, prices = option_pnl(
+        instruments.assign(dividend_yield=dividend_yields), scenarios, current,
+        {'Equity Index': vol_surface}, rate_curve, 0.2)
+    current_values = reference_values(current, 0, dividend_yields)
+    assert np.max(np.abs(prices.values - current_values)) <= 1e-10 * spot
+    reference = reference_values(scenarios.iloc[100], 0.2, dividend_yields) - current_values
+    assert np.max(np.abs(pnl.iloc[100].values - reference)) <= 1e-10 * spot
+    assert prices['C125'] < option_pnl(
+        instruments, scenarios, current, {'Equity Index': vol_surface}, rate_curve)[1]['C125']
+
+
+def test_option_pnl_percent():
+    surfaces = {'Equity Index': vol_surface}
+    pnl, prices = option_pnl(instruments, scenarios, current, surfaces, rate_curve, 0.2)
+    pnl_percent, prices_percent = option_pnl(
+        instruments, time_series.iloc[-300:-1], time_series.iloc[-1], surfaces, rate_curve,
+        0.2, percent=True)
+    assert np.max(np.abs(prices_percent.values - prices.values)) <= 1e-10 * spot
+    assert np.max(np.abs(pnl_percent.values - pnl.values)) <= 1e-10 * spot
+    with pytest.raises(ValueError):
+        option_pnl(instruments, scenarios, current, surfaces, rate_curve, percent=1)
+
+
+def test_option_pnl_flat_smile():
+    atm_surface = vol_surface[[1.]]
+    pnl, prices = option_pnl(
+        instruments, scenarios, current, {'Equity Index': atm_surface}, rate_curve)
+    sigma = np.interp(instruments['maturity'], tenor_years, current[atm_surface[1.]].values)
+    assert prices['C104'] == call_option(
+        spot * np.exp(current['1y']), instruments['strike']['C104'], sigma[3],
+        current['1y'], 1)
+
+
+def test_option_pnl_errors():
+    surfaces = {'Equity Index': vol_surface}
+    with pytest.raises(ValueError):
+        option_pnl(instruments.assign(type='forward'), scenarios, current, surfaces, rate_curve)
+    with pytest.raises(ValueError):
+        option_pnl(instruments.assign(underlying='1y'), scenarios, current, surfaces, rate_curve)
+    with pytest.raises(ValueError):
+        option_pnl(instruments, scenarios, current, surfaces, rate_curve, chunk_size=0)
+    with pytest.raises(ValueError):
+        option_pnl(instruments, scenarios, current, surfaces, rate_curve, workers=1.)
@@ -0,0 +1,81 @@
+# fortitudo.tech - Novel Investment Technologies.
+# Copyright (C) 2021-2025 Fortitudo Technologies.
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import numpy as np
+import pytest
+from context import (R, ScenarioStore, simulation_moments, portfolio_cvar, entropy_pooling,
+                     MeanCVaR)
+
+S, I = R.shape
+p = np.random.randint(1, S, (S, 1))
+p = p / np.sum(p)
+tol = 1e-10
+
+
+def test_scenario_store(tmp_path):
+    metadata = {'horizon': 1, 'source': 'pnl.csv'}
+    store = ScenarioStore.from_scenarios(str(tmp_path), R, {'prior': p}, metadata)
+    assert type(store.scenarios.base) is np.memmap
+    assert not store.scenarios.flags.writeable
+    assert np.all(store.scenarios == R.values)
+    assert store.names == list(R.columns)
+    assert store.metadata == metadata
+    assert store.probability_names == ['prior']
+
+    store = ScenarioStore(str(tmp_path))
+    prior = store.probabilities('prior')
+    assert type(prior.base) is np.memmap
+    assert np.all(prior == p)
+    moments = simulation_moments(store.scenarios, prior).values
+    assert np.max(np.abs(moments - simulation_moments(R.values, p).values)) <= tol
+    e = np.ones((I, 1)) / I
+    assert np.abs(portfolio_cvar(e, store.scenarios, prior) - portfolio_cvar(e, R, p)) <= tol
+
+    means = np.mean(R.values, axis=0)[:, np.newaxis]
+    posterior = entropy_pooling(prior, store.scenarios.T, means)
+    store.add_probabilities('posterior', posterior[:, 0])
+    store.add_probabilities('posterior', posterior)
+    assert ScenarioStore(str(tmp_path)).probability_names == ['prior', 'posterior']
+    assert np.all(store.probabilities('posterior') == posterior)
+    G = -np.eye(I)
+    h = np.zeros(I)
+    cvar_store = MeanCVaR(store.scenarios, G, h, p=store.probabilities('posterior'))
+    cvar_memory = MeanCVaR(R.values, G, h, p=posterior)
+    assert np.max(np.abs(
+        cvar_store.efficient_portfolio() - cvar_memory.efficient_portfolio())) <= 1e-6
+
+    array_store = ScenarioStore.from_scenarios(str(tmp_path / 'array'), R.values)
+    assert array_store.names == [str(i) for i in range(I)]
+    assert array_store.probability_names == []
+
+
+def test_scenario_store_chunks(tmp_path):
+    store = ScenarioStore.create(str(tmp_path), S, list(R.columns))
+    for start in range(0, S, 3000):
+        store.scenarios[start:start + 3000] = R.values[start:start + 3000]
+    store.flush()
+    assert np.all(ScenarioStore(str(tmp_path)).scenarios == R.values)
+    writable = ScenarioStore(str(tmp_path), mode='r+')
+    assert writable.scenarios.flags.writeable
+
+    with pytest.raises(ValueError):
+        ScenarioStore(str(tmp_path), mode='w+')
+    with pytest.raises(ValueError):
+        store.probabilities('prior')
+    with pytest.raises(ValueError):
+        store.add_probabilities('../prior', p)
+    with pytest.raises(ValueError):
+        store.add_probabilities('prior', p[1:])
@@ -17,8 +17,8 @@
 import numpy as np
 import pandas as pd
 from context import (
-    R, exp_decay_probs, normal_exp_decay_calib, covariance_matrix,
-    FullyFlexibleResampling, time_series)
+    R, exp_decay_probs, normal_exp_decay_calib, normal_exp_decay_calib_grid, covariance_matrix,
+    FullyFlexibleResampling, ExpDecayEstimator, time_series)
 from pytest import raises
 
 T, I = R.shape
@@ -67,6 +67,54 @@ def test_normal_exp_decay_calib():
     assert np.all(np.abs(cov_matrix.values - cov_matrix1)) <= tol
 
 
+def test_exp_decay_grid(monkeypatch):
+    half_lives = np.array([T / 8, T / 4, T / 2])
+    P = exp_decay_probs(R, half_lives)
+    means, cov_matrices = normal_exp_decay_calib_grid(R, half_lives)
+    monkeypatch.setattr('fortitudo.tech.simulation._GRID_CHUNK_SIZE', 2 * R.size)
+    assert np.max(np.abs(normal_exp_decay_calib_grid(R, half_lives)[1] - cov_matrices)) <= tol
+    means1, cov_matrices1 = normal_exp_decay_calib_grid(R.values, half_lives)
+    assert P.shape == (T, 3)
+    assert means.shape == (I, 3)
+    assert cov_matrices.shape == (3, I, I)
+    assert type(means) is pd.DataFrame
+    assert np.all(means.index == simulation_names)
+    assert type(means1) is np.ndarray
+    assert np.all(P[:, 2:3] == p)
+    for k, half_life in enumerate(half_lives):
+        mean_k, cov_matrix_k = normal_exp_decay_calib(R.values, half_life)
+        assert np.max(np.abs(P[:, k:k + 1] - exp_decay_probs(R, half_life))) <= tol
+        assert np.max(np.abs(means1[:, k:k + 1] - mean_k)) <= tol
+        assert np.max(np.abs(means.values[:, k:k + 1] - mean_k)) <= tol
+        assert np.max(np.abs(cov_matrices[k] - cov_matrix_k)) <= tol
+
+
+def test_exp_decay_estimator():
+    T_seed = T - 100
+    estimator = ExpDecayEstimator(R.iloc[:T_seed], T / 2)
+    mean_seed, cov_matrix_seed = normal_exp_decay_calib(R.iloc[:T_seed], T / 2)
+    mean_estimator, cov_matrix_estimator = estimator.calibration()
+    assert np.max(np.abs(mean_estimator.values - mean_seed.values)) <= tol
+    assert np.max(np.abs(cov_matrix_estimator.values - cov_matrix_seed.values)) <= tol
+
+    estimator.update(R.values[T_seed])
+    estimator.update(R.values[T_seed + 1:])
+    mean_estimator, cov_matrix_estimator = estimator.calibration()
+    assert type(mean_estimator) is pd.DataFrame
+    assert type(cov_matrix_estimator) is pd.DataFrame
+    assert np.all(mean_estimator.index == simulation_names)
+    assert np.max(np.abs(mean_estimator.values - mean.values)) <= tol
+    assert np.max(np.abs(cov_matrix_estimator.values - cov_matrix.values)) <= tol
+
+    estimator1 = ExpDecayEstimator(R.values[:T_seed], T / 2)
+    estimator1.update(R.values[T_seed:])
+    mean_estimator1, cov_matrix_estimator1 = estimator1.calibration()
+    assert type(mean_estimator1) is np.ndarray
+    assert mean_estimator1.shape == (I, 1)
+    assert np.max(np.abs(mean_estimator1 - mean1)) <= tol
+    assert np.max(np.abs(cov_matrix_estimator1 - cov_matrix1)) <= tol
+
+
 def test_relation():
     assert np.all(np.abs(mean1 - R.values.T @ p)) <= tol
     assert np.all(np.abs(cov_matrix - covariance_matrix(R, p))) <= tol
@@ -86,3 +134,228 @@ def test_fullyflexibleresampling():
     with raises(ValueError):
         ffr.compute_probabilities(
             imp_vol_state, np.percentile(imp_vol_state, [25, 25]))
+
+
+def test_fullyflexibleresampling_reference():
+    S_ref, H_ref = 200, 20
+    np.random.seed(5)
+    sim = ffr.simulate(S_ref, H_ref, probs2, states2, initial_state=0)
+    np.random.seed(5)
+    sim_indices = np.full((S_ref, H_ref), 1)
+    t = np.arange(len(states2))
+    for s in range(S_ref):
+        current_state = 0
+        for h in range(H_ref):
+            sim_indices[s, h] = np.random.choice(t, p=probs2[:, current_state])
+            current_state = states2[sim_indices[s, h]]
+    assert np.all(sim == np.swapaxes(log_changes[sim_indices], axis1=1, axis2=2))
+
+
+def test_fullyflexibleresampling_many_states():
+    K, S_many, H_many = 300, 100, 8
+    rng = np.random.default_rng(4)
+    states_many = np.concatenate((np.arange(K), rng.integers(0, K, T_tilde - K)))
+    probs_many = rng.random((T_tilde, K))**4
+    probs_many /= np.sum(probs_many, axis=0)
+    np.random.seed(9)
+    indices = ffr.simulate_indices(S_many, H_many, probs_many, states_many)
+    np.random.seed(9)
+    t = np.arange(T_tilde)
+    for s in range(S_many):
+        current_state = states_many[-1]
+        for h in range(H_many):
+            assert indices[s, h] == np.random.choice(t, p=probs_many[:, current_state])
+            current_state = states_many[indices[s, h]]
+    assert len(np.unique(states_many[indices])) > 200
+
+
+def test_fullyflexibleresampling_seed():
+    S_seed, H_seed = 25000, 2
+    sim1 = ffr.simulate(S_seed, H_seed, probs, states, seed=7)
+    sim3 = ffr.simulate(S_seed, H_seed, probs, states, seed=7, workers=3)
+    sim_sequence = ffr.simulate(
+        S_seed, H_seed, probs, states, seed=np.random.SeedSequence(7), workers=2)
+    assert sim1.shape == (S_seed, N, H_seed)
+    assert np.all(sim1 == sim3)
+    assert np.all(sim1 == sim_sequence)
+    sim_generator1 = ffr.simulate(S_seed, H_seed, probs, states, seed=np.random.default_rng(3))
+    sim_generator2 = ffr.simulate(
+        S_seed, H_seed, probs, states, seed=np.random.default_rng(3), workers=4)
+    assert np.all(sim_generator1 == sim_generator2)
+    assert not np.all(sim1 == sim_generator1)
+    with raises(ValueError):
+        ffr.simulate(S, H, probs, states, workers=2)
+    with raises(ValueError):
+        ffr.simulate(S, H, probs, states, seed=1, workers=0)
+
+
+def test_fullyflexibleresampling_streaming(tmp_path):
+    S_stream, H_stream = 12000, 3
+    sim = ffr.simulate(S_stream, H_stream, probs, states, seed=11)
+    sim_blocks = list(ffr.simulate_blocks(S_stream, H_stream, probs, states, seed=11, workers=2))
+    assert [block.shape[0] for block in sim_blocks] == [10000, 2000]
+    assert np.all(np.concatenate(sim_blocks) == sim)
+
+    indices = ffr.simulate_indices(S_stream, H_stream, probs, states, seed=11)
+    assert indices.shape == (S_stream, H_stream)
+    assert indices.dtype == np.uint16
+    assert np.all(np.swapaxes(log_changes[indices], axis1=1, axis2=2) == sim)
+
+    sim_memmap = ffr.simulate(
+        S_stream, H_stream, probs, states, seed=11, path=tmp_path / 'sim.npy')
+    assert np.all(np.load(tmp_path / 'sim.npy', mmap_mode='r') == sim)
+    assert np.all(sim_memmap == sim)
+
+    with raises(ValueError):
+        ffr.simulate_blocks(S_stream, H_stream, probs, states, workers=2)
+    np.random.seed(2)
+    sim_global = ffr.simulate(S_stream, H_stream, probs, states)
+    np.random.seed(2)
+    assert np.all(np.concatenate(list(ffr.simulate_blocks(
+        S_stream, H_stream, probs, states))) == sim_global)
+
+
+def test_fullyflexibleresampling_bounded_blocks(monkeypatch):
+    monkeypatch.setattr('fortitudo.tech.simulation._SIM_BLOCK_SIZE', 10)
+    simulate_indices = FullyFlexibleResampling._simulate_indices
+    simulated_blocks = []
+
+    def counted_simulate_indices(*args):
+        simulated_blocks.append(len(simulated_blocks))
+        return simulate_indices(*args)
+
+    monkeypatch.setattr(
+        FullyFlexibleResampling, '_simulate_indices', staticmethod(counted_simulate_indices))
+    blocks = ffr.simulate_blocks(1000, H, probs, states, seed=3, workers=2)
+    first_block = next(blocks)
+    assert len(simulated_blocks) <= 5
+    blocks.close()
+    assert np.all(first_block == ffr.simulate(10, H, probs, states, seed=3))
+    assert len(simulated_blocks) <= 6
+
+
+def test_fullyflexibleresampling_cumulative():
+    S_cum, H_cum = 500, 10
+    sim = ffr.simulate(S_cum, H_cum, probs, states, seed=13)
+    wealth = np.exp(np.cumsum(sim, axis=2))
+    peaks = np.maximum(np.maximum.accumulate(wealth, axis=2), 1)
+    drawdowns = np.maximum(np.max(1 - wealth / peaks, axis=2), 0)
+    cumulative, max_drawdowns = ffr.simulate_cumulative(
+        S_cum, H_cum, probs, states, seed=13, checkpoints=[2, 10, 5])
+    assert cumulative.shape == (S_cum, N, 3)
+    assert np.max(np.abs(cumulative - (wealth[:, :, [1, 9, 4]] - 1))) <= tol
+    assert np.max(np.abs(max_drawdowns - drawdowns)) <= tol
+
+    simple_returns = np.expm1(sim)
+    ffr_simple = FullyFlexibleResampling(np.expm1(log_changes))
+    cumulative_simple, max_drawdowns_simple = ffr_simple.simulate_cumulative(
+        S_cum, H_cum, probs, states, seed=13, log_returns=False)
+    assert np.max(np.abs(
+        cumulative_simple[:, :, 0] - (np.prod(1 + simple_returns, axis=2) - 1))) <= tol
+    assert np.max(np.abs(max_drawdowns_simple - drawdowns)) <= tol
+
+    with raises(ValueError):
+        ffr.simulate_cumulative(S, H, probs, states, checkpoints=[0, H])
+    with raises(ValueError):
+        ffr.simulate_cumulative(S, H, probs, states, checkpoints=[H + 1])
+    with raises(ValueError):
+        ffr.simulate_cumulative(S, H, probs, states, log_returns=1)
+
+
+def test_fullyflexibleresampling_probabilities():
+    conditioning_values = list(np.percentile(imp_vol_state, [20, 40, 60, 80]))
+    probs_parallel, states_parallel = ffr.compute_probabilities(
+        imp_vol_state, conditioning_values, T_tilde / 2, workers=3)
+    probs_serial, states_serial = ffr.compute_probabilities(
+        imp_vol_state, conditioning_values, T_tilde / 2)
+    assert probs_parallel.shape == (T_tilde, 5)
+    assert np.all(states_parallel == states_serial)
+    assert np.max(np.abs(probs_parallel - probs_serial)) <= 1e-6
+    for i in range(5):
+        state_values = imp_vol_state[states_serial == i]
+        posterior_mean = probs_serial[:, i] @ imp_vol_state
+        posterior_vol = np.sqrt(probs_serial[:, i] @ (imp_vol_state - posterior_mean)**2)
+        assert np.abs(posterior_mean - np.mean(state_values)) <= 1e-3
+        assert np.abs(posterior_vol - np.std(state_values)) <= 1e-3
+    with raises(ValueError):
+        ffr.compute_probabilities(imp_vol_state, conditioning_values, workers=0)
+
+
+def test_fullyflexibleresampling_multiple_states():
+    rate_state = time_series['10y'].values[1:]
+    state_variables = np.vstack((imp_vol_state, rate_state)).T
+    conditioning_values = [
+        list(np.percentile(imp_vol_state, [50, 95])), list(np.percentile(rate_state, [50, 95]))]
+    probs_joint, states_joint = ffr.compute_probabilities(state_variables, conditioning_values)
+    vol_ranges = np.searchsorted(conditioning_values[0], imp_vol_state)
+    rate_ranges = np.searchsorted(conditioning_values[1], rate_state)
+    joint_ranges = 3 * vol_ranges + rate_ranges
+    occupied_ranges = np.unique(joint_ranges)
+    assert len(occupied_ranges) == 8
+    assert probs_joint.shape == (T_tilde, len(occupied_ranges))
+    assert np.all(occupied_ranges[states_joint] == joint_ranges)
+    assert np.max(np.abs(np.sum(probs_joint, axis=0) - 1)) <= tol
+    for i in range(len(occupied_ranges)):
+        ind = states_joint == i
+        for state_variable in state_variables.T:
+            posterior_mean = probs_joint[:, i] @ state_variable
+            assert np.abs(posterior_mean - np.mean(state_variable[ind])) <= 1e-3 * np.std(
+                state_variable)
+            assert (np.sqrt(probs_joint[:, i] @ (state_variable - posterior_mean)**2)
+                    <= np.std(state_variable[ind]) + 1e-3 * np.std(state_variable))
+
+    probs_column, states_column = ffr.compute_probabilities(
+        imp_vol_state[:, np.newaxis], np.percentile(imp_vol_state, [25, 75]))
+    assert np.max(np.abs(probs_column - probs)) <= tol
+    assert np.all(states_column == states)
+    for state_variable in (imp_vol_state, imp_vol_state[:, np.newaxis]):
+        probs_nested, states_nested = ffr.compute_probabilities(
+            state_variable, [list(np.percentile(imp_vol_state, [25, 75]))])
+        assert np.max(np.abs(probs_nested - probs)) <= tol
+        assert np.all(states_nested == states)
+    with raises(ValueError):
+        ffr.compute_probabilities(state_variables, [conditioning_values[0]])
+    with raises(ValueError):
+        ffr.compute_probabilities(
+            state_variables, [conditioning_values[0], [np.max(rate_state)]])
+
+
+def test_fullyflexibleresampling_cache(tmp_path, monkeypatch):
+    conditioning_values = np.percentile(imp_vol_state, [25, 75])
+    ffr_cache = FullyFlexibleResampling(log_changes)
+    probs_cached, states_cached = ffr_cache.compute_probabilities(
+        imp_vol_state, conditioning_values, T_tilde / 2, cache_dir=tmp_path / 'ffr')
+    assert len(list((tmp_path / 'ffr').iterdir())) == 1
+    assert np.all(probs_cached == probs2)
+    assert np.all(states_cached == states2)
+
+    def not_computed(*args):
+        raise AssertionError('Cached probabilities were recomputed.')
+
+    monkeypatch.setattr(FullyFlexibleResampling, '_individual_probabilities', not_computed)
+    ffr_load = FullyFlexibleResampling(log_changes)
+    probs_loaded, states_loaded = ffr_load.compute_probabilities(
+        imp_vol_state, conditioning_values[::-1], T_tilde / 2, cache_dir=tmp_path / 'ffr')
+    assert np.all(probs_loaded == probs2)
+    assert np.all(states_loaded == states2)
+    cdfs = ffr_load._state_cdfs(probs_loaded)
+    assert ffr_load._state_cdfs(probs_loaded) is cdfs
+    assert np.max(np.abs(cdfs - np.cumsum(probs2, axis=0).T)) <= tol
+    np.random.seed(1)
+    sim_loaded = ffr_load.simulate(S, H, probs_loaded, states_loaded)
+    np.random.seed(1)
+    assert np.all(sim_loaded == ffr.simulate(S, H, probs2, states2))
+
+    probs_loaded[:, [0, 2]] = probs_loaded[:, [2, 0]]
+    assert np.all(ffr_load._state_cdfs(probs_loaded)[0] == cdfs[2])
+    np.random.seed(1)
+    sim_modified = ffr_load.simulate(S, H, probs_loaded, states_loaded)
+    np.random.seed(1)
+    assert np.all(sim_modified == ffr.simulate(S, H, probs_loaded.copy(), states2))
+
+    with raises(AssertionError):
+        ffr_load.compute_probabilities(
+            imp_vol_state, conditioning_values, T_tilde / 4, cache_dir=tmp_path / 'ffr')
+    with raises(ValueError):
+        FullyFlexibleResampling(log_changes[1:]).compute_probabilities(
+            imp_vol_state, conditioning_values, T_tilde / 2, cache_dir=tmp_path / 'ffr')